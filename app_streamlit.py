@@ -1,8 +1,27 @@
+import time
+_rerun_started = time.perf_counter()
+
 import streamlit as st
-import google.generativeai as genai
 import io
+import os
 import base64
-from PIL import Image
+import logging
+import math
+import uuid
+
+from audio_cache import AudioCache, make_cache_key
+from audio_post import postprocessing_available
+from clip_history import add_take, describe_take
+from generation import run_generation
+from jobs import DONE, FAILED, QUEUED, JobQueue
+from media_store import MediaStore, start_media_server
+from metrics import REGISTRY, configure_metrics_log, configure_phrase_log, start_metrics_server
+from prewarm import start_prewarmer
+from scheduler import BATCH, INTERACTIVE, CharacterBudgets, get_scheduler, parse_weights
+from worker_pool import pool_from_env
+from tts_engines import CLOUD_VOICES, ENGINES, LANGUAGES, OUTPUT_FORMATS, default_voice, mock_backend_enabled, model_for, native_format
+from voice_catalog import load_catalog
+from text_normalization import segment_text
 
 # --- Page Configuration ---
 st.set_page_config(
@@ -13,7 +32,7 @@ st.set_page_config(
 
 # --- Custom CSS Styling ---
 # (Your CSS remains the same)
-st.markdown("""
+APP_CSS = """
     <style>
         body {
             background-color: #0d1b2a;
@@ -81,6 +100,13 @@ st.markdown("""
         .stDownloadButton > button:hover {
             background-color: #146c45;
         }
+        .stLinkButton > a {
+            background-color: #1c7c54;
+            color: white;
+        }
+        .stLinkButton > a:hover {
+            background-color: #146c45;
+        }
         
         /* Error styling */
         .error-message {
@@ -101,35 +127,38 @@ st.markdown("""
             border-left: 4px solid #51cf66;
             margin: 10px 0;
         }
+        
+        /* Top-left logo */
+        .logo-left {
+            position: fixed;
+            top: 10px;
+            left: 15px;
+            z-index: 100;
+            background-color: rgba(255, 255, 255, 0.05);
+            padding: 5px 10px;
+            border-radius: 8px;
+        }
+        .logo-left img {
+            height: 100px;
+        }
     </style>
-""", unsafe_allow_html=True)
+"""
+st.markdown(APP_CSS, unsafe_allow_html=True)
 
-def add_logo():
-    logo_path = "Normal.png"
+@st.cache_resource
+def get_logo_html(logo_path="Normal.png"):
+    # Read and encode the logo once per process, not on every rerun.
     try:
-        logo = Image.open(logo_path)
-        st.markdown(
-            """
-            <style>
-                .logo-left {
-                    position: fixed;
-                    top: 10px;
-                    left: 15px;
-                    z-index: 100;
-                    background-color: rgba(255, 255, 255, 0.05);
-                    padding: 5px 10px;
-                    border-radius: 8px;
-                }
-                .logo-left img {
-                    height: 100px;
-                }
-            </style>
-            """,
-            unsafe_allow_html=True
-        )
-        st.markdown(f'<div class="logo-left"><img src="data:image/png;base64,{get_base64(logo_path)}" alt="logo"></div>', unsafe_allow_html=True)
+        return f'<div class="logo-left"><img src="data:image/png;base64,{get_base64(logo_path)}" alt="logo"></div>'
     except FileNotFoundError:
+        return None
+
+def add_logo():
+    logo_html = get_logo_html()
+    if logo_html is None:
         st.warning("Logo file 'Normal.png' not found.")
+    else:
+        st.markdown(logo_html, unsafe_allow_html=True)
 
 
 def get_base64(file_path):
@@ -142,6 +171,7 @@ def get_base64(file_path):
 @st.cache_resource
 def init_gemini():
     try:
+        import google.generativeai as genai
         # Configure the Gemini API key from Streamlit secrets
         genai.configure(api_key=st.secrets["GOOGLE_API_KEY"])
         return True
@@ -149,104 +179,398 @@ def init_gemini():
         st.error(f"Failed to initialize Gemini: {e}")
         return False
 
-# --- Gemini TTS Function ---
-import google.generativeai as genai
-import google.ai.generativelanguage as glm # Import the low-level types
+# --- Metrics Export ---
+@st.cache_resource
+def init_metrics():
+    # Once per process: Prometheus endpoint and/or JSON request log, if configured.
+    if os.environ.get("TTS_METRICS_PORT"):
+        start_metrics_server(int(os.environ["TTS_METRICS_PORT"]), os.environ.get("TTS_METRICS_HOST", "127.0.0.1"))
+    if os.environ.get("TTS_METRICS_LOG"):
+        configure_metrics_log(os.environ["TTS_METRICS_LOG"])
+    if os.environ.get("TTS_PHRASE_LOG"):
+        configure_phrase_log(os.environ["TTS_PHRASE_LOG"])
+    return True
+
+# --- Rerun Budget ---
+# Reruns triggered by widget changes (no synthesis) should stay well under this.
+RERUN_BUDGET_MS = float(os.environ.get("TTS_RERUN_BUDGET_MS", "50"))
+
+def check_rerun_budget(elapsed):
+    REGISTRY.observe_rerun(elapsed)
+    if elapsed * 1000 > RERUN_BUDGET_MS:
+        logging.getLogger("tts.rerun").warning(
+            "Rerun took %.1f ms (budget %.0f ms)", elapsed * 1000, RERUN_BUDGET_MS
+        )
 
-def synthesize_text_gemini(text, voice_style="default"):
-    """
-    Synthesize text using a modern Gemini model (Pro or Flash) by specifying
-    the audio mime type in the generation config. This is the correct method.
-    """
-    try:
-        # We use a powerful text model and instruct it to output audio.
-        # gemini-1.5-pro is a great choice. gemini-1.5-flash should also work.
-        model = genai.GenerativeModel('gemini-1.5-pro')
-
-        # The key is to provide the text directly as the content and use
-        # generation_config to specify the desired output format (MIME type).
-        response = model.generate_content(
-            text, # The text to be synthesized is the main content
-            generation_config=glm.GenerationConfig(
-                response_mime_type="audio/mpeg" # Request MP3 audio output
-            )
+# --- Synthesis Settings ---
+# Chunk size for parallel synthesis; the segmenter also keeps every chunk
+# under the engine's request byte limit.
+CHUNK_MAX_CHARS = int(os.environ.get("TTS_CHUNK_MAX_CHARS", "1000"))
+CHUNK_WORKERS = int(os.environ.get("TTS_CHUNK_WORKERS", "4"))
+
+# --- Audio Cache ---
+@st.cache_resource
+def get_audio_cache():
+    ttl = os.environ.get("AUDIO_CACHE_TTL_SECONDS")
+    return AudioCache(
+        cache_dir=os.environ.get("AUDIO_CACHE_DIR", ".audio_cache"),
+        max_memory_bytes=int(os.environ.get("AUDIO_CACHE_MEMORY_MB", "64")) * 1024 * 1024,
+        max_disk_bytes=int(os.environ.get("AUDIO_CACHE_DISK_MB", "1024")) * 1024 * 1024,
+        ttl_seconds=float(ttl) if ttl else None,
+    )
+
+# --- Voice Catalog ---
+@st.cache_resource
+def get_voice_catalog():
+    # Read from disk once per process; a stale list refreshes in the background.
+    ttl = float(os.environ.get("VOICE_CATALOG_TTL_HOURS", "24")) * 3600
+    return load_catalog(
+        cache_path=os.environ.get("VOICE_CATALOG_PATH", ".voice_catalog.json"),
+        ttl_seconds=ttl,
+        refresh=not mock_backend_enabled(),
+    )
+
+def select_cloud_voice(language):
+    catalog = get_voice_catalog()
+    gender_col, tier_col = st.columns(2)
+    gender = gender_col.selectbox("Gender", options=["Any"] + catalog.genders(language), format_func=str.title)
+    tier = tier_col.selectbox("Voice type", options=["Any"] + catalog.tiers(language))
+    voices = [v["name"] for v in catalog.voices_for(
+        language, None if gender == "Any" else gender, None if tier == "Any" else tier
+    )]
+    if not voices:
+        st.warning("No voices match these filters; using the default voice.")
+        return default_voice("Google Cloud TTS", language)
+    # The curated defaults come first when they match the filters.
+    preferred = [v for v in CLOUD_VOICES.get(language, []) if v in voices]
+    voices = preferred + [v for v in voices if v not in preferred]
+    return st.selectbox("Speaker", options=voices, format_func=catalog.describe)
+
+# --- Media Store ---
+@st.cache_resource
+def get_media_store():
+    # Generated audio lives on disk. With TTS_MEDIA_PORT and TTS_MEDIA_URL
+    # set it is served with Range support and the session keeps a URL rather
+    # than the clip; otherwise widgets get the bytes as before.
+    store = MediaStore(
+        root=os.environ.get("MEDIA_STORE_DIR", ".media"),
+        max_bytes=int(os.environ.get("MEDIA_STORE_MB", "2048")) * 1024 * 1024,
+    )
+    port = os.environ.get("TTS_MEDIA_PORT", "")
+    base_url = os.environ.get("TTS_MEDIA_URL", "")
+    if port and not base_url:
+        logging.getLogger("tts.media").warning("TTS_MEDIA_PORT is set without TTS_MEDIA_URL, serving audio inline")
+    elif port:
+        try:
+            start_media_server(store, int(port), os.environ.get("TTS_MEDIA_HOST", "127.0.0.1"))
+            store.base_url = base_url
+        except OSError as e:
+            logging.getLogger("tts.media").warning("Media server unavailable, serving audio inline: %s", e)
+    return store
+
+def session_key():
+    return st.session_state.setdefault("session_key", uuid.uuid4().hex)
+
+def user_key():
+    # Signed-in users are keyed by email and anonymous ones by client address,
+    # so a new tab does not start a new budget. Behind a proxy the address
+    # comes from the last hop of TTS_CLIENT_IP_HEADER (e.g. X-Forwarded-For).
+    if st.user.get("is_logged_in") and st.user.get("email"):
+        return st.user.get("email")
+    header = os.environ.get("TTS_CLIENT_IP_HEADER")
+    forwarded = st.context.headers.get(header) if header else None
+    address = forwarded.split(",")[-1].strip() if forwarded else st.context.ip_address
+    return f"ip:{address}" if address else session_key()
+
+def play_audio(media_id, audio_format, autoplay=False):
+    store = get_media_store()
+    mime = OUTPUT_FORMATS[audio_format]["mime"]
+    if store.base_url:
+        st.audio(store.url(media_id), format=mime, autoplay=autoplay)
+    else:
+        st.audio(store.read(media_id), format=mime, autoplay=autoplay)
+
+def download_audio(media_id, audio_format, file_name, key=None):
+    store = get_media_store()
+    if store.base_url:
+        st.link_button("📥 Download Audio", store.url(media_id, file_name), key=key)
+    else:
+        st.download_button(
+            "📥 Download Audio", 
+            data=store.read(media_id), 
+            file_name=file_name, 
+            mime=OUTPUT_FORMATS[audio_format]["mime"],
+            key=key,
         )
 
-        # When the request is correct, the response will contain a Part with a blob.
-        if response.parts and response.parts[0].blob:
-            # The audio data is in the 'data' attribute of the 'blob'
-            return response.parts[0].blob.data, None
-        else:
-            # This handles cases where the model might refuse the request
-            error_info = "The model did not return audio. Check the prompt feedback."
-            try:
-                error_info += f" Safety Ratings: {response.prompt_feedback}"
-            except Exception:
-                pass
-            return None, f"Gemini TTS Error: {error_info}"
+# --- Background Generation ---
+JOB_POLL_SECONDS = float(os.environ.get("TTS_JOB_POLL_SECONDS", "1"))
+HISTORY_MAX_TAKES = int(os.environ.get("TTS_HISTORY_MAX_TAKES", "20"))
+# Requests that send at most this many characters upstream jump ahead of bulk work.
+INTERACTIVE_MAX_CHARS = int(os.environ.get("TTS_INTERACTIVE_MAX_CHARS", "1500"))
+USER_WEIGHTS = parse_weights(os.environ.get("TTS_USER_WEIGHTS"))
 
-    except Exception as e:
-        error_message = f"Gemini TTS Error: {str(e)}"
-        if "API_KEY_INVALID" in str(e):
-            error_message += " Please check if your GOOGLE_API_KEY is configured correctly."
-        elif "PERMISSION_DENIED" in str(e) or "access" in str(e).lower():
-            error_message += " Your API key may not have permission for the selected model. Check your Google Cloud project."
-        # This is a new, important error to catch!
-        elif "response_mime_type" in str(e):
-             error_message += " The selected model may not support audio output. Try 'gemini-1.5-pro'."
-        return None, error_message
-# --- Fallback Google TTS Function ---
-def synthesize_text_google(text, voice, speed, pitch):
+@st.cache_resource
+def get_char_budgets():
+    # Characters per user per hour that may go upstream; 0 disables the limit.
+    return CharacterBudgets(int(os.environ.get("TTS_USER_CHAR_BUDGET", "100000")))
+
+@st.cache_resource
+def get_job_queue():
+    # With the worker tier a job holds its thread while a worker runs it, so
+    # there is one thread per worker process and one for pre-warming.
+    pool = get_worker_pool()
+    default = pool.total + 1 if pool is not None else 4
+    return JobQueue(workers=int(os.environ.get("TTS_JOB_WORKERS", "") or default))
+
+@st.cache_resource
+def get_worker_pool():
+    # None unless TTS_WORKER_PROCESSES / TTS_WORKER_ADDRESS enable the worker tier.
+    return pool_from_env()
+
+@st.cache_resource
+def init_prewarm():
+    # Once per process: warm the cache from hot phrases and the phrase log,
+    # only while no generation job is queued or running.
+    phrases = os.environ.get("TTS_PREWARM_PHRASES")
+    log_path = os.environ.get("TTS_PHRASE_LOG")
+    if not phrases and not log_path:
+        return None
+    jobs = get_job_queue()
+    every = float(os.environ.get("TTS_PREWARM_EVERY_HOURS", "0")) * 3600
+    return start_prewarmer(
+        get_audio_cache(), phrases, log_path,
+        top=int(os.environ.get("TTS_PREWARM_TOP", "200")),
+        every_seconds=every or None,
+        is_idle=lambda: jobs.active() == 0,
+        pause=float(os.environ.get("TTS_PREWARM_PAUSE_SECONDS", "1")),
+    )
+
+def plan_script(engine, language, text, voice, speed=1.0, pitch=0.0, polish=False,
+                audio_format="MP3", bitrate=None):
     """
-    Fallback Google TTS implementation
+    Split the script into stable segments and describe the generation as a
+    spec that can run on a job thread or a worker process. Segments unchanged
+    since the last generation with the same settings are reused from the
+    media store instead of going upstream. The spec's "cost" counts the
+    characters that still have to go upstream and sets its scheduling
+    priority. Returns `(spec, reused)`.
     """
-    try:
-        from google.cloud import texttospeech
-        
-        client = texttospeech.TextToSpeechClient()
+    segment_format = native_format(engine, audio_format)
+    chunks = segment_text(text, language, engine, max_chars=CHUNK_MAX_CHARS)
+    store = get_media_store()
+    previous = st.session_state.get("last_generation")
+    settings = (engine, language, voice, speed, pitch, segment_format)
+    reusable = previous["segments"] if previous and previous["settings"] == settings else {}
+    # Segments evicted from the media store have to be synthesized again.
+    reuse = {chunk: reusable[chunk] for chunk in chunks if chunk in reusable and store.exists(reusable[chunk])}
+    cache, model = get_audio_cache(), model_for(engine)
+    cost = sum(
+        len(chunk) for chunk in chunks
+        if chunk not in reuse
+        and not cache.contains(make_cache_key(engine, model, language, voice, speed, pitch, chunk, segment_format))
+    )
+    spec = {
+        "engine": engine, "language": language, "voice": voice, "speed": speed, "pitch": pitch,
+        "segment_format": segment_format, "audio_format": audio_format, "bitrate": bitrate, "polish": polish,
+        "chunks": chunks, "reuse": reuse, "chunk_workers": CHUNK_WORKERS,
+        "flow": session_key(), "cost": cost, "weight": USER_WEIGHTS.get(user_key(), 1.0),
+        "priority": INTERACTIVE if cost <= INTERACTIVE_MAX_CHARS else BATCH,
+    }
+    return spec, len(reuse)
 
-        input_text = texttospeech.SynthesisInput(text=text)
-        voice_params = texttospeech.VoiceSelectionParams(
-            language_code="-".join(voice.split("-")[:2]),
-            name=voice
-        )
-        audio_config = texttospeech.AudioConfig(
-            audio_encoding=texttospeech.AudioEncoding.MP3,
-            speaking_rate=speed,
-            pitch=pitch
-        )
+def remember_script(engine, language, voice, speed, pitch, audio_format, segments):
+    # Keep this take's segment ids so the next edit only re-synthesizes what changed.
+    st.session_state["last_generation"] = {
+        "settings": (engine, language, voice, speed, pitch, audio_format),
+        "segments": segments,
+    }
 
-        response = client.synthesize_speech(
-            request={"input": input_text, "voice": voice_params, "audio_config": audio_config}
+def generation_job(spec):
+    """
+    Build the job function for `spec`: handed to the worker tier when it is
+    enabled, otherwise synthesized on the job thread itself.
+    """
+    pool = get_worker_pool()
+    if pool is not None:
+        return lambda job: pool.run(spec, job.report, job.created_at)
+    store, cache = get_media_store(), get_audio_cache()
+    return lambda job: run_generation(spec, store, cache, job.report, job.created_at)
+
+def start_generation(engine, language, text, voice, speed=1.0, pitch=0.0, polish=False,
+                     audio_format="MP3", bitrate=None):
+    """
+    Queue the script for background synthesis, charged to the user's
+    character budget. The job id is kept in session state and the URL so
+    reruns and page reloads can follow it. Returns `(job, error)`.
+    """
+    spec, reused = plan_script(engine, language, text, voice, speed, pitch, polish, audio_format, bitrate)
+    if not spec["chunks"]:
+        return None, "No text to synthesize."
+    budgets, user = get_char_budgets(), user_key()
+    wait = budgets.charge(user, spec["cost"])
+    if math.isinf(wait):
+        return None, (f"This script needs {spec['cost']:,} new characters, more than the hourly budget of "
+                      f"{budgets.chars_per_hour:,}. Split it into smaller parts.")
+    if wait:
+        return None, (f"Character budget used up ({budgets.remaining(user):,} left this hour). "
+                      f"Try again in {format_wait(wait)}.")
+    run = generation_job(spec)
+
+    def charged(job):
+        # A failed take gives its characters back; segments that did finish
+        # are cached and free next time.
+        try:
+            result, error = run(job)
+        except Exception:
+            budgets.refund(user, spec["cost"])
+            raise
+        if error:
+            budgets.refund(user, spec["cost"])
+        return result, error
+
+    job = get_job_queue().submit(
+        charged,
+        flow=spec["flow"], cost=spec["cost"], priority=spec["priority"], weight=spec["weight"],
+        engine=engine, language=language, voice=voice, speed=speed, pitch=pitch,
+        segment_format=spec["segment_format"], audio_format=audio_format, reused=reused, chars=len(text),
+    )
+    st.session_state["job_id"] = job.id
+    st.query_params["job"] = job.id
+    return job, None
+
+def format_wait(seconds):
+    if seconds < 60:
+        return f"{max(1, round(seconds))}s"
+    return f"{round(seconds / 60)} min"
+
+def progress_label(job, meta, done, total):
+    # Before the first part lands, say how many calls are ahead at the engine.
+    if done == 0 and get_worker_pool() is None:
+        ahead, wait = get_scheduler(meta["engine"]).estimate(job.flow)
+        if ahead:
+            return f"Waiting for {meta['engine']}: {ahead} request(s) ahead · about {format_wait(wait)}"
+    return f"Generating part {min(done + 1, total)} of {total}..." if total else "Starting..."
+
+def show_job(job, streaming):
+    """
+    Render a job's progress, the parts finished so far and, once it is
+    done, the full track and download.
+    """
+    snapshot = job.snapshot()
+    meta = snapshot["meta"]
+    done, total = snapshot["progress"]
+    if snapshot["status"] == QUEUED:
+        jobs = get_job_queue()
+        ahead, wait = jobs.estimate(job.id)
+        st.info(f"⏳ Queued: {ahead} job(s) ahead of yours, {jobs.depth()} waiting in total · "
+                f"expected wait about {format_wait(wait)}")
+    elif not job.finished:
+        st.progress(done / total if total else 0.0, text=progress_label(job, meta, done, total))
+
+    if streaming:
+        for i, media_id in enumerate(snapshot["parts"]):
+            if total > 1:
+                st.caption(f"Part {i + 1} of {total}")
+            # Only the first part autoplays; browsers would play them all at once otherwise.
+            play_audio(media_id, meta["segment_format"], autoplay=i == 0)
+
+    if snapshot["status"] == FAILED:
+        st.markdown(f'<div class="error-message">❌ Error: {snapshot["error"]}</div>', unsafe_allow_html=True)
+    elif snapshot["status"] == DONE:
+        result = snapshot["result"]
+        remember_script(meta["engine"], meta["language"], meta["voice"], meta["speed"], meta["pitch"],
+                        meta["segment_format"], result["segments"])
+        add_take(
+            st.session_state.setdefault("history", []), job.id, result["media_id"], max_takes=HISTORY_MAX_TAKES,
+            engine=meta["engine"], language=meta["language"], voice=meta["voice"],
+            audio_format=meta["audio_format"], chars=meta["chars"],
         )
-
-        return response.audio_content, None
-    except Exception as e:
-        return None, str(e)
+        st.markdown('<div class="success-message">✅ Speech generated successfully!</div>', unsafe_allow_html=True)
+        total_time = snapshot["finished_at"] - snapshot["created_at"]
+        st.caption(f"⏱️ First audio in {result['time_to_first_audio']:.2f}s · complete in {total_time:.2f}s")
+        if meta["reused"]:
+            st.caption(f"♻️ Reused {meta['reused']} unchanged segment(s) from the previous take")
+        audio_format = meta["audio_format"]
+        if not streaming:
+            play_audio(result["media_id"], audio_format)
+        engine = meta["engine"]
+        download_audio(result["media_id"], audio_format,
+                       f"tts_output_{engine.lower().replace(' ', '_')}.{OUTPUT_FORMATS[audio_format]['ext']}")
+
+def show_history(current_job_id=None):
+    """
+    Earlier takes from this session, replayed from the media store without
+    any upstream calls.
+    """
+    takes = [take for take in st.session_state.get("history", []) if take["id"] != current_job_id]
+    if not takes:
+        return
+    with st.expander(f"🕘 Previous takes ({len(takes)})"):
+        take = st.selectbox("Compare with", options=takes, format_func=describe_take)
+        if not get_media_store().exists(take["media_id"]):
+            st.caption("This take has expired from the media store.")
+            return
+        play_audio(take["media_id"], take["audio_format"])
+        engine = take["engine"]
+        download_audio(take["media_id"], take["audio_format"],
+                       f"tts_output_{engine.lower().replace(' ', '_')}.{OUTPUT_FORMATS[take['audio_format']]['ext']}",
+                       key="history_download")
+
+@st.fragment(run_every=JOB_POLL_SECONDS)
+def poll_job(job_id, streaming):
+    # Reruns only this fragment while the job runs; the rest of the page stays put.
+    job = get_job_queue().get(job_id)
+    show_job(job, streaming)
+    if job.finished:
+        # A full rerun re-renders the result without the polling fragment.
+        st.rerun()
+
+def render_job(job_id, streaming):
+    job = get_job_queue().get(job_id)
+    if job is None:
+        # Expired, or submitted before a server restart.
+        st.session_state.pop("job_id", None)
+        st.query_params.pop("job", None)
+        return
+    if job.finished:
+        show_job(job, streaming)
+    else:
+        poll_job(job_id, streaming)
 
 # --- Main Application ---
 def main():
+    init_metrics()
+    init_prewarm()
     add_logo()
     
     st.markdown("<h1> Narration Generation</h1>", unsafe_allow_html=True)
     
-    # Initialize Gemini
-    if not init_gemini():
+    # Initialize Gemini (not needed when the local mock backend stands in for the APIs)
+    if mock_backend_enabled():
+        st.caption("🧪 Mock TTS backend enabled: no API calls are made.")
+    elif not init_gemini():
         st.stop()
     
     engine = st.selectbox(
         "TTS Engine", 
-        options=["Gemini TTS", "Google Cloud TTS"], 
+        options=ENGINES, 
         index=0
     )
     
-    lang_map = {
-        "English": "en-US",
-        "Hindi": "hi-IN",
-        "Telugu": "te-IN",
-    }
-    
-    language = st.selectbox("Language", options=list(lang_map.keys()), index=0)
+    # Cloud TTS offers every language the voice catalog has; LANGUAGES names
+    # the common ones and is all Gemini is offered.
+    names = {code: name for name, code in LANGUAGES.items()}
+    if engine == "Gemini TTS":
+        codes = list(LANGUAGES.values())
+    else:
+        codes = list(names) + [c for c in get_voice_catalog().languages() if c not in names]
+    language = st.selectbox(
+        "Language",
+        options=codes,
+        index=0,
+        format_func=lambda code: f"{names[code]} ({code})" if code in names else code,
+    )
     
     if engine == "Gemini TTS":
     # The gemini-1.5-flash model uses a standard high-quality voice.
@@ -255,50 +579,67 @@ def main():
         voice = "default" 
         st.info("The Gemini 1.5 Flash model will be used with its standard, high-quality voice.")
     else:
-        voices = {
-            "en-US": ["en-US-Wavenet-D", "en-US-Wavenet-F", "en-US-Standard-C"],
-            "hi-IN": ["hi-IN-Wavenet-A", "hi-IN-Standard-A"],
-            "te-IN": ["te-IN-Wavenet-A"],
-        }
-        voice = st.selectbox("Speaker", options=voices.get(lang_map[language], []))
+        voice = select_cloud_voice(language)
     
     st.markdown("### Text Input")
     text_input = st.text_area("Enter Text", height=150, placeholder="Enter the text you want to convert to speech...")
     
+    streaming = st.checkbox("Start playback while generating", value=True)
+    can_polish = postprocessing_available()
+    polish = st.checkbox(
+        "Polish audio (even loudness, trimmed silences, smooth joins)",
+        value=can_polish,
+        disabled=not can_polish,
+        help=None if can_polish else "Requires ffmpeg on the server.",
+    )
+    
+    # Without ffmpeg only the formats the engine returns directly, and can be
+    # joined without remuxing, are offered.
+    formats = [
+        f for f in OUTPUT_FORMATS
+        if can_polish or (native_format(engine, f) == f and not OUTPUT_FORMATS[f].get("container"))
+    ]
+    audio_format = st.selectbox("Format", options=formats, index=0)
+    bitrate = st.selectbox(
+        "Bitrate",
+        options=["Engine default", "32k", "64k", "128k"],
+        disabled=not can_polish or audio_format == "WAV",
+        help="Lower bitrates make smaller downloads. Opus stays clear for speech at 32k.",
+    )
+    bitrate = None if bitrate == "Engine default" or audio_format == "WAV" else bitrate
+    
     generate = st.button("🔊 Generate Speech")
     
     if generate:
         if not text_input:
             st.markdown('<div class="error-message">⚠️ Please enter some text to convert.</div>', unsafe_allow_html=True)
         else:
-            with st.spinner("Generating speech..."):
-                if engine == "Gemini TTS":
-                    audio, error = synthesize_text_gemini(text_input, voice)
-                else:
-                    # Note: You will need to handle authentication for Google Cloud TTS separately
-                    # if you haven't set up Application Default Credentials.
-                    audio, error = synthesize_text_google(text_input, voice, 1.0, 0.0)
-                
-                if error:
-                    st.markdown(f'<div class="error-message">❌ Error: {error}</div>', unsafe_allow_html=True)
-                else:
-                    st.markdown('<div class="success-message">✅ Speech generated successfully!</div>', unsafe_allow_html=True)
-                    st.audio(audio, format="audio/mpeg")
-                    st.download_button(
-                        "📥 Download Audio", 
-                        data=audio, 
-                        file_name=f"tts_output_{engine.lower().replace(' ', '_')}.mp3", 
-                        mime="audio/mpeg"
-                    )
+            # Note: You will need to handle authentication for Google Cloud TTS separately
+            # if you haven't set up Application Default Credentials.
+            job, error = start_generation(engine, language, text_input, voice, 1.0, 0.0, polish, audio_format, bitrate)
+            if error:
+                st.markdown(f'<div class="error-message">❌ Error: {error}</div>', unsafe_allow_html=True)
+    remaining = get_char_budgets().remaining(user_key())
+    if remaining is not None:
+        st.caption(f"Character budget: {remaining:,} left this hour")
+    
+    # Generation runs in the background; follow the latest job across reruns and reloads.
+    job_id = st.session_state.get("job_id") or st.query_params.get("job")
+    if job_id:
+        render_job(job_id, streaming)
+    show_history(job_id)
     
     st.markdown("---")
     st.markdown(
         '<div style="text-align: center; color: #888; margin-top: 2rem;">Powered by HANYAA - Together, We\'ll Create Magic ✨</div>', 
         unsafe_allow_html=True
     )
+    return generate
 
 if __name__ == "__main__":
-    main()
+    generated = main()
+    if not generated:
+        check_rerun_budget(time.perf_counter() - _rerun_started)
     
     
     
@@ -0,0 +1,57 @@
+import asyncio
+import functools
+import os
+import threading
+from concurrent.futures import ThreadPoolExecutor
+
+from scheduler import BATCH
+from tts_engines import synthesize
+
+_executor = None
+_executor_lock = threading.Lock()
+
+
+def default_executor():
+    """
+    Threads that run engine calls for coroutines, sized by TTS_ASYNC_WORKERS.
+    Kept apart from the event loop's default executor, so calls waiting for
+    an engine slot never starve `asyncio.to_thread` users.
+    """
+    global _executor
+    with _executor_lock:
+        if _executor is None:
+            _executor = ThreadPoolExecutor(
+                max_workers=int(os.environ.get("TTS_ASYNC_WORKERS", "32")), thread_name_prefix="tts-async",
+            )
+        return _executor
+
+
+# --- Async Engine Interface ---
+class AsyncTTSEngine:
+    """
+    Async interface to one engine.
+
+    Each call runs `tts_engines.synthesize` on `executor` (`default_executor()`
+    when None), so coroutines get the same cache, single-flight, circuit
+    breaker, retry, failover, rate limit and metrics policy as the UI. Calls
+    queue for the engine's slots at batch priority, behind interactive
+    requests.
+    """
+
+    def __init__(self, name, executor=None):
+        self.name = name
+        self.executor = executor
+
+    async def synthesize(self, text, language, voice, speed=1.0, pitch=0.0, cache=None, failover=True):
+        """
+        Returns `(audio, error)`, like the synchronous engine functions.
+        """
+        call = functools.partial(
+            synthesize, self.name, language, text, voice, speed, pitch,
+            cache=cache, failover=failover, flow="batch", priority=BATCH,
+        )
+        return await asyncio.get_running_loop().run_in_executor(self.executor or default_executor(), call)
+
+
+def get_async_engine(name, executor=None):
+    return AsyncTTSEngine(name, executor)
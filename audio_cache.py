@@ -0,0 +1,298 @@
+import hashlib
+import json
+import os
+import threading
+import time
+import unicodedata
+from collections import OrderedDict
+
+
+# --- Cache Keys ---
+def normalize_text(text):
+    """
+    Normalize text so trivially different inputs (whitespace, unicode forms)
+    share a cache entry.
+    """
+    text = unicodedata.normalize("NFC", text)
+    return " ".join(text.split())
+
+
+def make_cache_key(engine, model, language, voice, speed, pitch, text, audio_format="MP3"):
+    """
+    Build a content-addressed key from every parameter that affects the audio.
+    """
+    params = [engine, model, language, voice, float(speed), float(pitch), normalize_text(text)]
+    if audio_format != "MP3":
+        # MP3 keys predate output formats; leave them unchanged.
+        params.append(audio_format)
+    payload = json.dumps(params, ensure_ascii=False)
+    return hashlib.sha256(payload.encode("utf-8")).hexdigest()
+
+
+# --- Disk Budget ---
+class DiskLRU:
+    """
+    Sizes and recency of the files in `root` accepted by `include(name)`,
+    kept in memory so a store can stay under `max_bytes` without listing the
+    directory on every write. Seeded from disk (oldest mtime first) at
+    startup and again every `rescan_seconds`, which also picks up files
+    written by other processes sharing the directory.
+    """
+
+    def __init__(self, root, max_bytes, include=lambda name: True, rescan_seconds=600):
+        self.root = root
+        self.max_bytes = max_bytes
+        self.include = include
+        self.rescan_seconds = rescan_seconds
+        self._entries = OrderedDict()  # name -> size, least recently used first
+        self._bytes = 0
+        self._lock = threading.Lock()
+        self._scan()
+
+    def _scan(self):
+        entries = []
+        for name in os.listdir(self.root):
+            if not self.include(name):
+                continue
+            try:
+                stat = os.stat(os.path.join(self.root, name))
+            except FileNotFoundError:
+                continue
+            entries.append((stat.st_mtime, name, stat.st_size))
+        entries.sort()
+        with self._lock:
+            self._entries = OrderedDict((name, size) for _, name, size in entries)
+            self._bytes = sum(self._entries.values())
+            self._scanned_at = time.monotonic()
+
+    def total_bytes(self):
+        with self._lock:
+            return self._bytes
+
+    def touch(self, name, size=None):
+        """
+        Mark `name` most recently used. Pass `size` when the file was just
+        written. Least recently used files are then removed until the total
+        is back under `max_bytes`; the newest file is always kept.
+        """
+        if time.monotonic() - self._scanned_at > self.rescan_seconds:
+            self._scan()
+        evicted = []
+        with self._lock:
+            if size is not None:
+                self._bytes += size - self._entries.get(name, 0)
+                self._entries[name] = size
+            elif name not in self._entries:
+                return
+            self._entries.move_to_end(name)
+            while self._bytes > self.max_bytes and len(self._entries) > 1:
+                victim, victim_size = self._entries.popitem(last=False)
+                self._bytes -= victim_size
+                evicted.append(victim)
+        for victim in evicted:
+            try:
+                os.remove(os.path.join(self.root, victim))
+            except FileNotFoundError:
+                pass
+
+    def discard(self, name):
+        """
+        Forget `name` after it was deleted.
+        """
+        with self._lock:
+            size = self._entries.pop(name, None)
+            if size is not None:
+                self._bytes -= size
+
+
+# --- Two-Tier Audio Cache ---
+class AudioCache:
+    """
+    In-memory LRU (bounded by total bytes) backed by an on-disk store.
+
+    Entries live in `cache_dir` as `<key>.bin`; the file mtime is used for
+    TTL checks so the disk tier survives restarts. The disk tier is kept under
+    `max_disk_bytes` by evicting the least recently used files.
+    """
+
+    def __init__(self, cache_dir=".audio_cache", max_memory_bytes=64 * 1024 * 1024,
+                 max_disk_bytes=1024 * 1024 * 1024, ttl_seconds=None):
+        self.cache_dir = cache_dir
+        self.max_memory_bytes = max_memory_bytes
+        self.max_disk_bytes = max_disk_bytes
+        self.ttl_seconds = ttl_seconds
+        self.hits = 0
+        self.misses = 0
+        self._memory = OrderedDict()  # key -> (audio bytes, stored_at)
+        self._memory_bytes = 0
+        self._lock = threading.Lock()
+        self._disk = None
+        if cache_dir:
+            os.makedirs(cache_dir, exist_ok=True)
+            self._disk = DiskLRU(cache_dir, max_disk_bytes, include=lambda name: name.endswith(".bin"))
+
+    def _path(self, key):
+        return os.path.join(self.cache_dir, f"{key}.bin")
+
+    def _expired(self, stored_at):
+        return self.ttl_seconds is not None and time.time() - stored_at > self.ttl_seconds
+
+    def _remember(self, key, audio, stored_at):
+        # Caller holds the lock.
+        if key in self._memory:
+            self._memory_bytes -= len(self._memory.pop(key)[0])
+        if len(audio) > self.max_memory_bytes:
+            return
+        self._memory[key] = (audio, stored_at)
+        self._memory_bytes += len(audio)
+        while self._memory_bytes > self.max_memory_bytes:
+            _, (evicted, _) = self._memory.popitem(last=False)
+            self._memory_bytes -= len(evicted)
+
+    def get(self, key):
+        with self._lock:
+            entry = self._memory.get(key)
+            if entry is not None:
+                audio, stored_at = entry
+                if not self._expired(stored_at):
+                    self._memory.move_to_end(key)
+                    self.hits += 1
+                    return audio
+                self._memory_bytes -= len(self._memory.pop(key)[0])
+
+        audio = self._read_disk(key)
+        with self._lock:
+            if audio is None:
+                self.misses += 1
+                return None
+            self._remember(key, audio, time.time())
+            self.hits += 1
+            return audio
+
+    def put(self, key, audio, memory=True):
+        """
+        Store `audio`. With `memory=False` (background warm-up) only the disk
+        tier is written, so live entries are not pushed out of memory.
+        """
+        if memory:
+            with self._lock:
+                self._remember(key, audio, time.time())
+        self._write_disk(key, audio)
+
+    def contains(self, key):
+        """
+        Whether `key` is cached, without counting a lookup or promoting it.
+        """
+        with self._lock:
+            entry = self._memory.get(key)
+            if entry is not None and not self._expired(entry[1]):
+                return True
+        if not self.cache_dir:
+            return False
+        try:
+            return not self._expired(os.path.getmtime(self._path(key)))
+        except FileNotFoundError:
+            return False
+
+    def _read_disk(self, key):
+        if not self.cache_dir:
+            return None
+        path = self._path(key)
+        name = f"{key}.bin"
+        try:
+            if self._expired(os.path.getmtime(path)):
+                os.remove(path)
+                self._disk.discard(name)
+                return None
+            with open(path, "rb") as f:
+                audio = f.read()
+        except FileNotFoundError:
+            self._disk.discard(name)
+            return None
+        self._disk.touch(name)
+        return audio
+
+    def _write_disk(self, key, audio):
+        if not self.cache_dir:
+            return
+        # Write to a temp file and rename so readers never see partial audio.
+        tmp_path = f"{self._path(key)}.{os.getpid()}.{threading.get_ident()}.tmp"
+        with open(tmp_path, "wb") as f:
+            f.write(audio)
+        os.replace(tmp_path, self._path(key))
+        self._disk.touch(f"{key}.bin", len(audio))
+
+    def stats(self):
+        with self._lock:
+            lookups = self.hits + self.misses
+            return {
+                "hits": self.hits,
+                "misses": self.misses,
+                "hit_rate": self.hits / lookups if lookups else 0.0,
+                "memory_entries": len(self._memory),
+                "memory_bytes": self._memory_bytes,
+            }
+
+
+def cached_synthesis(cache, key, synthesize):
+    """
+    Return `(audio, error)` from the cache, or call `synthesize()` and store
+    the audio on success. Errors are never cached.
+    """
+    audio = cache.get(key)
+    if audio is not None:
+        return audio, None
+    audio, error = synthesize()
+    if not error and audio:
+        cache.put(key, audio)
+    return audio, error
+
+
+# --- Request Coalescing ---
+class _Call:
+    def __init__(self):
+        self.done = threading.Event()
+        self.result = None
+        self.error = None
+
+
+class SingleFlight:
+    """
+    Collapses concurrent calls with the same key into one: the first caller
+    runs `fn`, callers arriving while it is in flight wait for its result.
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._calls = {}
+
+    def do(self, key, fn):
+        """
+        Returns `(result, shared)`; `shared` is True for callers that waited
+        on another caller's result. Exceptions propagate to every caller.
+        """
+        with self._lock:
+            call = self._calls.get(key)
+            leader = call is None
+            if leader:
+                call = self._calls[key] = _Call()
+        if not leader:
+            call.done.wait()
+            if call.error is not None:
+                raise call.error
+            return call.result, True
+        try:
+            call.result = fn()
+        except BaseException as e:
+            call.error = e
+            raise
+        finally:
+            with self._lock:
+                del self._calls[key]
+            call.done.set()
+        return call.result, False
+
+    def in_flight(self):
+        with self._lock:
+            return len(self._calls)
+
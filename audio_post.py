@@ -0,0 +1,218 @@
+"""
+Audio post-processing on decoded PCM.
+
+Segments are decoded with ffmpeg into NumPy arrays one at a time, loudness
+normalized, trimmed of leading/trailing silence and joined with short
+equal-power crossfades, then streamed into an encoder. Only one segment's
+PCM is held in memory, so memory stays flat however long the narration is.
+"""
+import io
+import os
+import shutil
+import subprocess
+import tempfile
+import threading
+import wave
+
+import numpy as np
+
+SAMPLE_RATE = 24000
+FRAME_MS = 10
+
+
+def ffmpeg_binary():
+    return os.environ.get("FFMPEG_BINARY") or shutil.which("ffmpeg")
+
+
+def postprocessing_available():
+    return ffmpeg_binary() is not None
+
+
+# --- Decode / Encode ---
+def _pump(source, sink):
+    # Feed/drain a pipe on a thread so ffmpeg never blocks on a full buffer.
+    try:
+        sink.write(source)
+    except BrokenPipeError:
+        pass
+    finally:
+        sink.close()
+
+
+def decode_pcm(audio, sample_rate=SAMPLE_RATE):
+    """
+    Decode compressed audio bytes to mono float32 samples in [-1, 1].
+    """
+    proc = subprocess.Popen(
+        [ffmpeg_binary(), "-v", "error", "-i", "pipe:0", "-f", "f32le", "-ac", "1", "-ar", str(sample_rate), "pipe:1"],
+        stdin=subprocess.PIPE, stdout=subprocess.PIPE, stderr=subprocess.PIPE,
+    )
+    writer = threading.Thread(target=_pump, args=(audio, proc.stdin), daemon=True)
+    writer.start()
+    pcm = proc.stdout.read()
+    writer.join()
+    stderr = proc.stderr.read()
+    if proc.wait() != 0:
+        raise RuntimeError(f"ffmpeg could not decode audio: {stderr.decode(errors='replace').strip()}")
+    return np.frombuffer(pcm, dtype=np.float32)
+
+
+class PCMEncoder:
+    """
+    Streams float32 PCM blocks into an ffmpeg encoder and collects the output.
+    """
+
+    def __init__(self, codec_args=("-f", "mp3"), bitrate=None, sample_rate=SAMPLE_RATE):
+        args = [ffmpeg_binary(), "-v", "error", "-f", "f32le", "-ac", "1", "-ar", str(sample_rate), "-i", "pipe:0"]
+        args += list(codec_args)
+        if bitrate:
+            args += ["-b:a", bitrate]
+        args += ["pipe:1"]
+        self._proc = subprocess.Popen(args, stdin=subprocess.PIPE, stdout=subprocess.PIPE, stderr=subprocess.PIPE)
+        self._output = []
+        self._reader = threading.Thread(target=self._drain, daemon=True)
+        self._reader.start()
+
+    def _drain(self):
+        for block in iter(lambda: self._proc.stdout.read(65536), b""):
+            self._output.append(block)
+
+    def write(self, samples):
+        if len(samples):
+            self._proc.stdin.write(np.ascontiguousarray(samples, dtype=np.float32).tobytes())
+
+    def finish(self):
+        self._proc.stdin.close()
+        self._reader.join()
+        stderr = self._proc.stderr.read()
+        if self._proc.wait() != 0:
+            raise RuntimeError(f"ffmpeg could not encode audio: {stderr.decode(errors='replace').strip()}")
+        return b"".join(self._output)
+
+
+# --- Processing ---
+def _frame_rms(samples, frame):
+    usable = len(samples) - len(samples) % frame
+    if usable == 0:
+        return np.sqrt(np.mean(np.square(samples))) if len(samples) else np.zeros(0)
+    return np.sqrt(np.mean(np.square(samples[:usable].reshape(-1, frame)), axis=1))
+
+
+def trim_silence(samples, threshold_dbfs=-45.0, keep_ms=120, sample_rate=SAMPLE_RATE):
+    """
+    Cut leading and trailing silence, keeping `keep_ms` of padding each side.
+    """
+    frame = sample_rate * FRAME_MS // 1000
+    rms = np.atleast_1d(_frame_rms(samples, frame))
+    voiced = np.flatnonzero(rms > 10 ** (threshold_dbfs / 20))
+    if len(voiced) == 0:
+        return samples[:0]
+    keep = sample_rate * keep_ms // 1000
+    start = max(0, voiced[0] * frame - keep)
+    end = min(len(samples), (voiced[-1] + 1) * frame + keep)
+    return samples[start:end]
+
+
+def normalize_loudness(samples, target_dbfs=-20.0, threshold_dbfs=-45.0, sample_rate=SAMPLE_RATE):
+    """
+    Scale so the RMS of voiced frames hits `target_dbfs`, without clipping.
+    """
+    if not len(samples):
+        return samples
+    frame = sample_rate * FRAME_MS // 1000
+    rms = np.atleast_1d(_frame_rms(samples, frame))
+    voiced = rms[rms > 10 ** (threshold_dbfs / 20)]
+    if len(voiced) == 0:
+        return samples
+    gain = 10 ** (target_dbfs / 20) / np.sqrt(np.mean(np.square(voiced)))
+    peak = np.max(np.abs(samples))
+    if peak * gain > 0.99:
+        gain = 0.99 / peak
+    return samples * np.float32(gain)
+
+
+def postprocess_segments(segments, normalize=True, target_dbfs=-20.0, trim=True, crossfade_ms=15,
+                         codec_args=("-f", "mp3"), bitrate=None, sample_rate=SAMPLE_RATE):
+    """
+    Decode, normalize, trim and crossfade `segments` (compressed audio bytes)
+    into one track encoded with ffmpeg `codec_args`. With every step turned
+    off this is a plain decode-and-join transcode. Returns `(audio, error)`.
+    """
+    if not postprocessing_available():
+        return None, "Audio post-processing needs ffmpeg on the PATH (or FFMPEG_BINARY)."
+    fade = sample_rate * crossfade_ms // 1000
+    ramp = np.linspace(0.0, np.pi / 2, fade, dtype=np.float32)
+    fade_in, fade_out = np.sin(ramp), np.cos(ramp)
+
+    try:
+        encoder = PCMEncoder(codec_args, bitrate, sample_rate)
+        tail = None
+        for audio in segments:
+            samples = decode_pcm(audio, sample_rate)
+            if trim:
+                samples = trim_silence(samples, sample_rate=sample_rate)
+            if normalize:
+                samples = normalize_loudness(samples, target_dbfs, sample_rate=sample_rate)
+            if fade == 0 or len(samples) < 2 * fade:
+                # Too short to crossfade; flush the held tail and emit as-is.
+                if tail is not None:
+                    encoder.write(tail)
+                    tail = None
+                encoder.write(samples)
+                continue
+            if tail is not None:
+                head = samples[:fade]
+                encoder.write(tail * fade_out + head * fade_in)
+                samples = samples[fade:]
+            # Hold back the end of this segment to blend with the next one.
+            encoder.write(samples[:-fade])
+            tail = samples[-fade:]
+        if tail is not None:
+            encoder.write(tail)
+        return encoder.finish(), None
+    except (OSError, RuntimeError) as e:
+        return None, f"Audio post-processing failed: {e}"
+
+
+def join_wav(segments):
+    """
+    Concatenate WAV segments (same sample format) without re-encoding.
+    """
+    out = io.BytesIO()
+    writer = None
+    for audio in segments:
+        with wave.open(io.BytesIO(audio), "rb") as reader:
+            if writer is None:
+                writer = wave.open(out, "wb")
+                writer.setparams(reader.getparams())
+            writer.writeframes(reader.readframes(reader.getnframes()))
+    if writer is not None:
+        writer.close()
+    return out.getvalue()
+
+
+def concat_streams(segments, ext, container):
+    """
+    Join whole encoded files (such as Ogg Opus streams) into one `container`
+    stream with ffmpeg's concat demuxer, copying packets without re-encoding.
+    Byte concatenation would leave chained streams that most players stop
+    after the first of.
+    """
+    with tempfile.TemporaryDirectory(prefix="tts-concat-") as tmp:
+        listing = []
+        for i, audio in enumerate(segments):
+            path = os.path.join(tmp, f"{i:05d}.{ext}")
+            with open(path, "wb") as f:
+                f.write(audio)
+            listing.append(f"file '{path}'")
+        manifest = os.path.join(tmp, "segments.txt")
+        with open(manifest, "w") as f:
+            f.write("\n".join(listing) + "\n")
+        proc = subprocess.run(
+            [ffmpeg_binary(), "-v", "error", "-f", "concat", "-safe", "0", "-i", manifest,
+             "-c", "copy", "-f", container, "pipe:1"],
+            stdout=subprocess.PIPE, stderr=subprocess.PIPE,
+        )
+    if proc.returncode != 0:
+        raise RuntimeError(f"ffmpeg could not join audio: {proc.stderr.decode(errors='replace').strip()}")
+    return proc.stdout
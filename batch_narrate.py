@@ -0,0 +1,217 @@
+"""
+Headless batch narration.
+
+Reads a CSV or JSONL file of rows with `id`, `text` and optional `language`,
+`engine` and `voice` columns, and writes one audio file per row. Progress is
+appended to `manifest.jsonl` in the output directory, so re-running the same
+command resumes where an interrupted run stopped.
+
+    python batch_narrate.py scripts.csv --out narrations --workers 4
+"""
+import argparse
+import asyncio
+import csv
+import json
+import os
+import re
+import sys
+import threading
+import time
+
+from async_engines import get_async_engine
+from audio_cache import AudioCache
+from metrics import configure_metrics_log
+from text_normalization import segment_text
+from tts_engines import ENGINES, LANGUAGES, default_voice
+from tts_pipeline import synthesize_chunked_async
+
+MANIFEST_NAME = "manifest.jsonl"
+
+_ENGINE_ALIASES = {
+    "gemini": "Gemini TTS",
+    "google": "Google Cloud TTS",
+    "cloud": "Google Cloud TTS",
+}
+
+
+# --- Input ---
+def read_rows(path):
+    if path.endswith(".jsonl"):
+        with open(path, encoding="utf-8") as f:
+            return [json.loads(line) for line in f if line.strip()]
+    with open(path, encoding="utf-8", newline="") as f:
+        return list(csv.DictReader(f))
+
+
+def normalize_row(row, default_engine, default_language):
+    """
+    Fill in defaults and map friendly names ("English", "gemini") to the values
+    the engines expect.
+    """
+    engine = (row.get("engine") or default_engine).strip()
+    engine = _ENGINE_ALIASES.get(engine.lower(), engine)
+    if engine not in ENGINES:
+        raise ValueError(f"unknown engine {engine!r}")
+    language = (row.get("language") or default_language).strip()
+    language = LANGUAGES.get(language, language)
+    voice = (row.get("voice") or "").strip()
+    if not voice:
+        voice = default_voice(engine, language)
+    return {
+        "id": str(row["id"]).strip(),
+        "text": row["text"],
+        "engine": engine,
+        "language": language,
+        "voice": voice,
+    }
+
+
+def output_path(out_dir, item_id):
+    safe_id = re.sub(r"[^A-Za-z0-9._-]+", "_", item_id)
+    return os.path.join(out_dir, f"{safe_id}.mp3")
+
+
+# --- Manifest ---
+def load_finished(manifest_path):
+    """
+    Return the ids recorded as done whose audio file still exists.
+    """
+    finished = set()
+    if not os.path.exists(manifest_path):
+        return finished
+    with open(manifest_path, encoding="utf-8") as f:
+        for line in f:
+            try:
+                entry = json.loads(line)
+            except json.JSONDecodeError:
+                # A run killed mid-write can leave a truncated last line.
+                continue
+            if entry.get("status") == "done" and os.path.exists(entry.get("file", "")):
+                finished.add(entry["id"])
+            elif entry.get("status") == "failed":
+                finished.discard(entry["id"])
+    return finished
+
+
+class Manifest:
+    def __init__(self, path):
+        self._file = open(path, "a", encoding="utf-8")
+        self._lock = threading.Lock()
+
+    def record(self, **entry):
+        with self._lock:
+            self._file.write(json.dumps(entry, ensure_ascii=False) + "\n")
+            self._file.flush()
+
+    def close(self):
+        self._file.close()
+
+
+# --- Batch Run ---
+def _write_audio(path, audio):
+    tmp_path = f"{path}.tmp"
+    with open(tmp_path, "wb") as f:
+        f.write(audio)
+    os.replace(tmp_path, path)
+
+
+async def narrate_item(item, out_dir, cache):
+    engine = get_async_engine(item["engine"])
+    audio, error = await synthesize_chunked_async(
+        segment_text(item["text"], item["language"], item["engine"]),
+        lambda chunk: engine.synthesize(chunk, item["language"], item["voice"], cache=cache),
+    )
+    if error:
+        return None, error
+    path = output_path(out_dir, item["id"])
+    await asyncio.to_thread(_write_audio, path, audio)
+    return path, None
+
+
+async def _run_batch(todo, out_dir, workers, cache, manifest):
+    semaphore = asyncio.Semaphore(max(1, workers))
+    counts = {"done": 0, "failed": 0}
+
+    async def run_one(item):
+        async with semaphore:
+            try:
+                path, error = await narrate_item(item, out_dir, cache)
+            except Exception as e:
+                path, error = None, str(e)
+        if error:
+            counts["failed"] += 1
+            manifest.record(id=item["id"], status="failed", error=str(error))
+            print(f"[failed] {item['id']}: {error}", file=sys.stderr)
+        else:
+            counts["done"] += 1
+            manifest.record(id=item["id"], status="done", file=path, chars=len(item["text"]))
+            print(f"[done] {item['id']} -> {path}")
+
+    await asyncio.gather(*(run_one(item) for item in todo))
+    return counts
+
+
+def run_batch(items, out_dir, workers=4, cache=None):
+    """
+    Narrate `items` on one event loop with at most `workers` rows in flight,
+    skipping rows the manifest already records as done. Upstream calls are
+    paced by each engine's rate limiter. Returns a summary dict.
+    """
+    os.makedirs(out_dir, exist_ok=True)
+    manifest_path = os.path.join(out_dir, MANIFEST_NAME)
+    finished = load_finished(manifest_path)
+    todo = [item for item in items if item["id"] not in finished]
+    manifest = Manifest(manifest_path)
+
+    started = time.perf_counter()
+    try:
+        counts = asyncio.run(_run_batch(todo, out_dir, workers, cache, manifest))
+    finally:
+        manifest.close()
+
+    elapsed = time.perf_counter() - started
+    return {
+        "skipped": len(items) - len(todo),
+        "done": counts["done"],
+        "failed": counts["failed"],
+        "seconds": elapsed,
+        "items_per_minute": counts["done"] / elapsed * 60 if elapsed > 0 else 0.0,
+    }
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Render narrations for every row of a CSV or JSONL file.")
+    parser.add_argument("input", help="CSV or JSONL file with id, text and optional language, engine, voice")
+    parser.add_argument("--out", default="narrations", help="output directory (also holds the manifest)")
+    parser.add_argument("--workers", type=int, default=4, help="rows synthesized concurrently")
+    parser.add_argument("--engine", default="Gemini TTS", help="default engine for rows without one")
+    parser.add_argument("--language", default="en-US", help="default language for rows without one")
+    parser.add_argument("--cache-dir", default=".audio_cache", help="shared audio cache directory")
+    parser.add_argument("--metrics-log", help="append one JSON line per synthesis request to this file")
+    args = parser.parse_args(argv)
+
+    if args.metrics_log:
+        configure_metrics_log(args.metrics_log)
+    if os.environ.get("GOOGLE_API_KEY"):
+        import google.generativeai as genai
+        genai.configure(api_key=os.environ["GOOGLE_API_KEY"])
+
+    try:
+        items = [normalize_row(row, args.engine, args.language) for row in read_rows(args.input)]
+    except (KeyError, ValueError) as e:
+        parser.error(f"invalid input row: {e}")
+
+    summary = run_batch(
+        items, args.out,
+        workers=args.workers,
+        cache=AudioCache(cache_dir=args.cache_dir),
+    )
+    print(
+        f"{summary['done']} done, {summary['failed']} failed, {summary['skipped']} already finished "
+        f"in {summary['seconds']:.1f}s ({summary['items_per_minute']:.1f} items/min)"
+    )
+    return 1 if summary["failed"] else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,181 @@
+"""
+Offline latency/throughput benchmark for the synthesis request path.
+
+Runs the same chunk-and-synthesize pipeline the UI uses against the local
+mock backend, across text lengths and concurrency levels, and reports
+p50/p95/p99 latency, time-to-first-audio, throughput and peak memory.
+
+    python bench_tts.py --lengths 200,2000,10000 --concurrency 1,4,16
+    python bench_tts.py --latency 0.5 --jitter 0.2 --error-rate 0.02 --json > bench_output.txt
+"""
+import argparse
+import json
+import os
+import sys
+import time
+import tracemalloc
+from concurrent.futures import ThreadPoolExecutor
+
+# The benchmark measures our request path, not the project quota.
+os.environ.setdefault("GEMINI_TTS_RPM", "1000000")
+os.environ.setdefault("GEMINI_TTS_CPM", "1000000000")
+os.environ.setdefault("GOOGLE_CLOUD_TTS_RPM", "1000000")
+os.environ.setdefault("GOOGLE_CLOUD_TTS_CPM", "1000000000")
+
+from mock_engine import MockTTSBackend
+from text_normalization import segment_text
+from tts_engines import ENGINES, default_voice, synthesize, use_mock_backend
+from tts_pipeline import iter_synthesized_chunks
+
+_SENTENCES = [
+    "The quick brown fox jumps over the lazy dog.",
+    "Narration should sound natural and unhurried.",
+    "Every chapter begins with a short summary of what came before.",
+    "Please remember to save your work regularly.",
+    "Thank you for listening to this episode.",
+]
+
+
+def sample_text(length, take=0):
+    """
+    Deterministic English prose of roughly `length` characters. Each `take`
+    words every sentence differently, so concurrent requests are not merged
+    into one upstream call.
+    """
+    parts, size, i = [], 0, 0
+    while size < length:
+        sentence = _SENTENCES[i % len(_SENTENCES)]
+        # Vary the text so chunks are not all identical.
+        sentence = f"{sentence[:-1]} take {take} number {i}."
+        parts.append(sentence)
+        size += len(sentence) + 1
+        i += 1
+    return " ".join(parts)[:length]
+
+
+def percentile(values, pct):
+    if not values:
+        return float("nan")
+    ordered = sorted(values)
+    index = min(len(ordered) - 1, max(0, round(pct / 100 * (len(ordered) - 1))))
+    return ordered[index]
+
+
+# --- Benchmark Run ---
+def run_request(engine, language, text, chunk_max_chars, chunk_workers):
+    started = time.perf_counter()
+    first_audio = None
+    audio_bytes = 0
+    error = None
+    voice = default_voice(engine, language)
+    for audio, error in iter_synthesized_chunks(
+        segment_text(text, language, engine, max_chars=chunk_max_chars),
+        lambda chunk: synthesize(engine, language, chunk, voice),
+        max_workers=chunk_workers,
+    ):
+        if error:
+            break
+        if first_audio is None:
+            first_audio = time.perf_counter() - started
+        audio_bytes += len(audio)
+    return {
+        "latency": time.perf_counter() - started,
+        "ttfa": first_audio,
+        "bytes": audio_bytes,
+        "error": bool(error),
+    }
+
+
+def run_scenario(engine, language, length, concurrency, requests, chunk_max_chars, chunk_workers):
+    texts = [sample_text(length, take) for take in range(requests)]
+    tracemalloc.start()
+    started = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=concurrency) as pool:
+        results = list(pool.map(
+            lambda text: run_request(engine, language, text, chunk_max_chars, chunk_workers),
+            texts,
+        ))
+    elapsed = time.perf_counter() - started
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+
+    ok = [r for r in results if not r["error"]]
+    latencies = [r["latency"] for r in ok]
+    ttfas = [r["ttfa"] for r in ok if r["ttfa"] is not None]
+    return {
+        "chars": length,
+        "concurrency": concurrency,
+        "requests": requests,
+        "errors": len(results) - len(ok),
+        "p50": percentile(latencies, 50),
+        "p95": percentile(latencies, 95),
+        "p99": percentile(latencies, 99),
+        "ttfa_p50": percentile(ttfas, 50),
+        "ttfa_p95": percentile(ttfas, 95),
+        "req_per_s": len(ok) / elapsed if elapsed else 0.0,
+        "chars_per_s": len(ok) * length / elapsed if elapsed else 0.0,
+        "peak_mb": peak / (1024 * 1024),
+    }
+
+
+def format_table(rows):
+    header = (
+        f"{'chars':>7} {'conc':>5} {'reqs':>5} {'err':>4} {'p50':>7} {'p95':>7} {'p99':>7} "
+        f"{'ttfa50':>7} {'ttfa95':>7} {'req/s':>7} {'chars/s':>9} {'peakMB':>7}"
+    )
+    lines = [header, "-" * len(header)]
+    for r in rows:
+        lines.append(
+            f"{r['chars']:>7} {r['concurrency']:>5} {r['requests']:>5} {r['errors']:>4} "
+            f"{r['p50']:>7.3f} {r['p95']:>7.3f} {r['p99']:>7.3f} "
+            f"{r['ttfa_p50']:>7.3f} {r['ttfa_p95']:>7.3f} "
+            f"{r['req_per_s']:>7.2f} {r['chars_per_s']:>9.0f} {r['peak_mb']:>7.2f}"
+        )
+    return "\n".join(lines)
+
+
+def _int_list(value):
+    return [int(v) for v in value.split(",") if v]
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Benchmark the synthesis path against the mock backend.")
+    parser.add_argument("--engine", default="Gemini TTS", choices=ENGINES)
+    parser.add_argument("--language", default="en-US")
+    parser.add_argument("--lengths", type=_int_list, default=[200, 2000, 10000], help="text lengths in chars")
+    parser.add_argument("--concurrency", type=_int_list, default=[1, 4, 16], help="concurrent requests")
+    parser.add_argument("--requests", type=int, default=None, help="requests per scenario (default: 4 x concurrency)")
+    parser.add_argument("--latency", type=float, default=0.3, help="mock upstream latency in seconds")
+    parser.add_argument("--jitter", type=float, default=0.1, help="mock latency jitter in seconds")
+    parser.add_argument("--error-rate", type=float, default=0.0, help="mock transient error rate")
+    parser.add_argument("--per-char-latency", type=float, default=0.0005, help="extra mock latency per char")
+    parser.add_argument("--chunk-max-chars", type=int, default=1000)
+    parser.add_argument("--chunk-workers", type=int, default=4)
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--json", action="store_true", help="print one JSON object per scenario")
+    args = parser.parse_args(argv)
+
+    backend = MockTTSBackend(
+        latency=args.latency, jitter=args.jitter, error_rate=args.error_rate,
+        per_char_latency=args.per_char_latency, seed=args.seed,
+    )
+    use_mock_backend(backend)
+
+    rows = []
+    for length in args.lengths:
+        for concurrency in args.concurrency:
+            row = run_scenario(
+                args.engine, args.language, length, concurrency,
+                args.requests or concurrency * 4, args.chunk_max_chars, args.chunk_workers,
+            )
+            rows.append(row)
+            if args.json:
+                print(json.dumps(row))
+    if not args.json:
+        print(format_table(rows))
+        print(f"\nmock upstream calls: {backend.calls}")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,28 @@
+"""
+Per-session history of generated takes.
+
+A session's history holds only metadata and media ids; the audio itself is
+already in the media store on disk and is read back from there whenever a
+take is replayed or downloaded.
+"""
+import time
+
+
+# --- Take History ---
+def add_take(history, take_id, media_id, max_takes=20, **meta):
+    """
+    Record a take at the front of `history` (a list kept in session state),
+    dropping the oldest beyond `max_takes`. Recording the same take twice is
+    a no-op.
+    """
+    if any(take["id"] == take_id for take in history):
+        return history
+    history.insert(0, dict(meta, id=take_id, media_id=media_id, created_at=time.time()))
+    del history[max_takes:]
+    return history
+
+
+def describe_take(take):
+    when = time.strftime("%H:%M:%S", time.localtime(take["created_at"]))
+    voice = "" if take.get("voice") in (None, "default") else f" · {take['voice']}"
+    return f"{when} · {take['engine']}{voice} · {take['audio_format']} · {take['chars']} chars"
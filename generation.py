@@ -0,0 +1,99 @@
+"""
+One script generation, independent of where it runs.
+
+A generation is described by a plain, picklable spec dict so the same code
+runs on a job thread in the Streamlit process or in a worker process on
+another node. Audio goes through the shared cache and media store; only
+media ids come back.
+"""
+import logging
+import time
+
+from audio_post import concat_streams, join_wav, postprocessing_available, postprocess_segments
+from scheduler import BATCH
+from tts_engines import OUTPUT_FORMATS, synthesize
+from tts_pipeline import iter_synthesized_chunks
+
+
+def join_segments(segments, polish=False, segment_format="MP3", output_format="MP3", bitrate=None):
+    """
+    Stitch segment audio into one `output_format` track, optionally
+    normalizing loudness, trimming silence and crossfading the joins.
+    Segments the engine could not produce in `output_format` are transcoded.
+    Returns `(audio, error)`.
+    """
+    if polish or bitrate or segment_format != output_format:
+        audio, error = postprocess_segments(
+            segments, normalize=polish, trim=polish, crossfade_ms=15 if polish else 0,
+            codec_args=OUTPUT_FORMATS[output_format]["ffmpeg_args"], bitrate=bitrate,
+        )
+        if not error or segment_format != output_format:
+            return audio, error
+        # Polish and bitrate are nice to have; fall back to the raw join.
+        logging.getLogger("tts.audio").warning(error)
+    if segment_format == "WAV":
+        return join_wav(segments), None
+    container = OUTPUT_FORMATS[segment_format].get("container")
+    if container and len(segments) > 1:
+        if not postprocessing_available():
+            return None, f"Joining {segment_format} segments needs ffmpeg on the PATH (or FFMPEG_BINARY)."
+        try:
+            return concat_streams(segments, OUTPUT_FORMATS[segment_format]["ext"], container), None
+        except (OSError, RuntimeError) as e:
+            return None, f"Joining audio failed: {e}"
+    # MP3 frames play back-to-back when concatenated.
+    return b"".join(segments), None
+
+
+def make_chunk_synthesizer(spec, store, cache=None):
+    """
+    Per-chunk synthesis for `spec`: chunks listed in `spec["reuse"]` are
+    read back from the media store, the rest go to the engine.
+    """
+    reuse = spec.get("reuse", {})
+
+    def synthesize_chunk(chunk):
+        if chunk in reuse:
+            audio = store.read(reuse[chunk])
+            if audio is not None:
+                return audio, None
+        return synthesize(spec["engine"], spec["language"], chunk, spec["voice"], spec["speed"], spec["pitch"],
+                          cache=cache, audio_format=spec["segment_format"], flow=spec.get("flow"),
+                          priority=spec.get("priority", BATCH), weight=spec.get("weight", 1.0))
+
+    return synthesize_chunk
+
+
+def run_generation(spec, store, cache=None, report=None, started=None):
+    """
+    Synthesize `spec["chunks"]`, publishing each segment to `store` as soon
+    as it lands and calling `report(done, total, media_id)`. Returns
+    `(result, error)`; the result holds the final track's media id, the
+    per-chunk segment ids and the time to first audio since `started`.
+    """
+    started = started or time.time()
+    chunks = spec["chunks"]
+    report = report or (lambda done, total, part=None: None)
+    segments = []
+    segment_ids = []
+    time_to_first_audio = None
+    report(0, len(chunks))
+    for audio, error in iter_synthesized_chunks(
+        chunks, make_chunk_synthesizer(spec, store, cache), max_workers=spec.get("chunk_workers", 4)
+    ):
+        if error:
+            return None, error
+        if time_to_first_audio is None:
+            time_to_first_audio = time.time() - started
+        segments.append(audio)
+        segment_ids.append(store.put(audio, OUTPUT_FORMATS[spec["segment_format"]]["ext"]))
+        report(len(segments), len(chunks), segment_ids[-1])
+    audio, error = join_segments(segments, spec["polish"], spec["segment_format"], spec["audio_format"],
+                                 spec["bitrate"])
+    if error:
+        return None, error
+    return {
+        "media_id": store.put(audio, OUTPUT_FORMATS[spec["audio_format"]]["ext"]),
+        "segments": dict(zip(chunks, segment_ids)),
+        "time_to_first_audio": time_to_first_audio,
+    }, None
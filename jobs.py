@@ -0,0 +1,158 @@
+"""
+Background generation jobs.
+
+Long syntheses run on worker threads instead of the Streamlit script thread,
+so widget interactions don't interrupt them and a reloaded page can pick the
+result up again by job id.
+"""
+import logging
+import threading
+import time
+import uuid
+
+from metrics import REGISTRY
+from scheduler import BATCH, FairQueue, ServiceRate
+
+logger = logging.getLogger("tts.jobs")
+
+QUEUED = "queued"
+RUNNING = "running"
+DONE = "done"
+FAILED = "failed"
+
+
+class Job:
+    """
+    One unit of background work. `progress` is `(done, total)`; `parts` lists
+    what the job has produced so far (e.g. media ids of finished segments).
+    """
+
+    def __init__(self, fn, meta=None, cost=1, flow=None):
+        self.id = uuid.uuid4().hex
+        self.fn = fn
+        self.meta = meta or {}
+        self.cost = cost
+        self.flow = flow
+        self.status = QUEUED
+        self.progress = (0, 0)
+        self.parts = []
+        self.result = None
+        self.error = None
+        self.created_at = time.time()
+        self.started_at = None
+        self.finished_at = None
+        self._lock = threading.Lock()
+
+    @property
+    def finished(self):
+        return self.status in (DONE, FAILED)
+
+    def report(self, done, total, part=None):
+        """
+        Called by the job function as work completes.
+        """
+        with self._lock:
+            self.progress = (done, total)
+            if part is not None:
+                self.parts.append(part)
+
+    def snapshot(self):
+        with self._lock:
+            return {
+                "id": self.id,
+                "status": self.status,
+                "progress": self.progress,
+                "parts": list(self.parts),
+                "result": self.result,
+                "error": self.error,
+                "created_at": self.created_at,
+                "started_at": self.started_at,
+                "finished_at": self.finished_at,
+                "meta": self.meta,
+            }
+
+
+class JobQueue:
+    """
+    Fair queue (see `scheduler.FairQueue`) drained by `workers` daemon
+    threads: jobs are ordered by priority class, then fairly between flows
+    (sessions) by their cost in characters.
+
+    Job functions take the Job and return `(result, error)`. Finished jobs
+    are kept for `retention_seconds` so reloaded pages can still fetch them.
+    """
+
+    def __init__(self, workers=4, retention_seconds=3600):
+        self.workers = workers
+        self.retention_seconds = retention_seconds
+        self.service = ServiceRate()
+        self._jobs = {}
+        self._queue = FairQueue()
+        self._lock = threading.Lock()
+        self._ready = threading.Condition(self._lock)
+        for i in range(workers):
+            threading.Thread(target=self._work, name=f"tts-job-{i}", daemon=True).start()
+
+    def submit(self, fn, flow=None, cost=1, priority=BATCH, weight=1.0, **meta):
+        job = Job(fn, meta, cost, flow)
+        with self._lock:
+            self._prune()
+            self._jobs[job.id] = job
+            self._queue.put(job, flow, cost, priority, weight)
+            self._ready.notify()
+        return job
+
+    def get(self, job_id):
+        with self._lock:
+            return self._jobs.get(job_id)
+
+    def depth(self):
+        """
+        Jobs waiting for a worker.
+        """
+        with self._lock:
+            return len(self._queue)
+
+    def estimate(self, job_id):
+        """
+        `(ahead, seconds)`: queued jobs that will start before `job_id` and
+        the expected wait until it does.
+        """
+        with self._lock:
+            count, cost = self._queue.ahead(lambda _, job: job.id == job_id)
+        return count, self.service.estimate(cost, self.workers)
+
+    def active(self):
+        """
+        Jobs queued or running.
+        """
+        with self._lock:
+            return sum(not job.finished for job in self._jobs.values())
+
+    def _prune(self):
+        # Caller holds the lock.
+        cutoff = time.time() - self.retention_seconds
+        for job_id in [j.id for j in self._jobs.values() if j.finished and j.finished_at < cutoff]:
+            del self._jobs[job_id]
+
+    def _work(self):
+        while True:
+            with self._ready:
+                self._ready.wait_for(lambda: len(self._queue))
+                job = self._queue.pop()
+            with job._lock:
+                job.status = RUNNING
+                job.started_at = time.time()
+            REGISTRY.observe_queue_wait("jobs", job.started_at - job.created_at)
+            try:
+                result, error = job.fn(job)
+            except Exception as e:
+                logger.exception("Job %s crashed", job.id)
+                result, error = None, f"Unexpected error: {e}"
+            with job._lock:
+                job.result = result
+                job.error = error
+                job.status = FAILED if error else DONE
+                job.finished_at = time.time()
+                job.fn = None
+            self.service.record(job.cost, job.finished_at - job.started_at)
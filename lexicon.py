@@ -0,0 +1,200 @@
+"""
+Per-language pronunciation lexicon.
+
+Recurring names, acronyms and product terms are rewritten to how they
+should be spoken before text is normalized and sent to an engine. Entries
+live in a JSON file (TTS_LEXICON, default `lexicon.json`) keyed by "*" (all
+languages), a base language ("en") or a full code ("en-IN"); more specific
+entries win:
+
+    {
+      "*": {"Hanyaa": "Hun-yaa"},
+      "en": {"SQL": "sequel", "GCP": "G C P"},
+      "hi": {"AI": "ए आई"}
+    }
+
+Terms match whole words, case-sensitively, longest match first. Each
+language's entries are compiled once into an Aho-Corasick automaton, so a
+script is rewritten in one pass however many entries there are. The file is
+reloaded when it changes.
+"""
+import json
+import logging
+import os
+import threading
+import unicodedata
+from collections import deque
+
+logger = logging.getLogger("tts.lexicon")
+
+
+def _is_word_char(ch):
+    # Combining marks (Devanagari and Telugu vowel signs) are part of the word.
+    return ch.isalnum() or ch == "_" or unicodedata.category(ch)[0] == "M"
+
+
+# --- Matcher ---
+class Lexicon:
+    """
+    Compiled term -> spoken-form rewrites for one language.
+    """
+
+    def __init__(self, entries=None):
+        self.entries = {term: spoken for term, spoken in (entries or {}).items() if term}
+        self._goto = [{}]
+        self._fail = [0]
+        self._out = [()]  # lengths of the terms ending at each node
+        for term in self.entries:
+            self._add(term)
+        self._link()
+
+    def __bool__(self):
+        return bool(self.entries)
+
+    def _add(self, term):
+        node = 0
+        for ch in term:
+            nxt = self._goto[node].get(ch)
+            if nxt is None:
+                nxt = len(self._goto)
+                self._goto[node][ch] = nxt
+                self._goto.append({})
+                self._fail.append(0)
+                self._out.append(())
+            node = nxt
+        self._out[node] = (len(term),)
+
+    def _link(self):
+        # Breadth-first, so every node's failure target is finished first.
+        queue = deque(self._goto[0].values())
+        while queue:
+            node = queue.popleft()
+            for ch, child in self._goto[node].items():
+                fail = self._fail[node]
+                while fail and ch not in self._goto[fail]:
+                    fail = self._fail[fail]
+                target = self._goto[fail].get(ch, 0)
+                self._fail[child] = target if target != child else 0
+                self._out[child] += self._out[self._fail[child]]
+                queue.append(child)
+
+    def _matches(self, text):
+        node = 0
+        for end, ch in enumerate(text, 1):
+            while node and ch not in self._goto[node]:
+                node = self._fail[node]
+            node = self._goto[node].get(ch, 0)
+            for length in self._out[node]:
+                yield end - length, end
+
+    def _whole_word(self, text, start, end):
+        if start > 0 and _is_word_char(text[start]) and _is_word_char(text[start - 1]):
+            return False
+        if end < len(text) and _is_word_char(text[end - 1]) and _is_word_char(text[end]):
+            return False
+        return True
+
+    def apply(self, text):
+        """
+        `text` with every whole-word term replaced by its spoken form.
+        Overlapping matches resolve to the leftmost, then the longest.
+        """
+        if not self.entries:
+            return text
+        matches = sorted(
+            ((start, end) for start, end in self._matches(text) if self._whole_word(text, start, end)),
+            key=lambda m: (m[0], -m[1]),
+        )
+        parts, position = [], 0
+        for start, end in matches:
+            if start < position:
+                continue
+            parts.append(text[position:start])
+            parts.append(self.entries[text[start:end]])
+            position = end
+        parts.append(text[position:])
+        return "".join(parts)
+
+
+EMPTY = Lexicon()
+
+
+# --- Loading ---
+def _validate(data):
+    # {"<language>": {"<term>": "<spoken form>", ...}, ...}
+    if not isinstance(data, dict):
+        raise ValueError("expected an object keyed by language")
+    for language, entries in data.items():
+        if not isinstance(entries, dict):
+            raise ValueError(f"entries for {language!r} must be an object")
+        for term, spoken in entries.items():
+            if not isinstance(spoken, str):
+                raise ValueError(f"spoken form of {term!r} in {language!r} must be a string")
+    return data
+
+
+class LexiconFile:
+    """
+    The lexicon file at `path`, compiled per language on first use and
+    reloaded when its modification time changes. A missing file means no
+    rewrites; an unreadable or wrongly shaped one leaves the previous
+    entries in place.
+    """
+
+    def __init__(self, path):
+        self.path = path
+        self._mtime = None
+        self._entries = {}
+        self._compiled = {}
+        self._lock = threading.Lock()
+
+    def _reload(self):
+        # Caller holds the lock.
+        try:
+            mtime = os.stat(self.path).st_mtime_ns
+        except OSError:
+            mtime = None
+        if mtime == self._mtime:
+            return
+        self._mtime = mtime
+        entries = {}
+        if mtime is not None:
+            try:
+                with open(self.path, encoding="utf-8") as f:
+                    entries = _validate(json.load(f))
+            except (OSError, ValueError) as e:
+                # A half-saved or mistyped edit keeps the last good lexicon.
+                logger.warning("Could not load the lexicon %s, keeping the previous one: %s", self.path, e)
+                return
+        self._entries = entries
+        self._compiled = {}
+
+    def for_language(self, language):
+        with self._lock:
+            self._reload()
+            lexicon = self._compiled.get(language)
+            if lexicon is None:
+                base = language.split("-")[0].lower()
+                entries = {}
+                for key in ("*", base, language):
+                    entries.update(self._entries.get(key, {}))
+                lexicon = Lexicon(entries) if entries else EMPTY
+                self._compiled[language] = lexicon
+            return lexicon
+
+
+_files = {}
+_files_lock = threading.Lock()
+
+
+def lexicon_for(language, path=None):
+    """
+    The compiled lexicon for a BCP-47 code such as "hi-IN", from `path` or
+    TTS_LEXICON.
+    """
+    path = path or os.environ.get("TTS_LEXICON", "lexicon.json")
+    with _files_lock:
+        lexicon_file = _files.get(path)
+        if lexicon_file is None:
+            lexicon_file = _files[path] = LexiconFile(path)
+    return lexicon_file.for_language(language)
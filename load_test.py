@@ -0,0 +1,352 @@
+"""
+Concurrent-session load test for the Streamlit app.
+
+Drives the real `app_streamlit.py` with Streamlit's headless AppTest, one
+AppTest per simulated session, against the local mock backend. Every
+session repeats a realistic flow: pick an engine and a language, type a
+script, click Generate, poll until the take is ready and download it. All
+sessions share this process and its cached resources, as they would in
+one Streamlit server. AppTest cannot run two scripts at once, so script
+runs are serialized (see `_run_lock`): rerun latency is the time spent in
+the run itself, and the wait for another session's run is reported apart.
+
+For each concurrency level it reports rerun latency percentiles, the wait
+for the run lock, synthesis
+queueing delay (waiting for a job worker and for an engine call slot), RSS
+growth per session and completed flows per second. The saturation point is
+the first level at which throughput stops scaling or p95 rerun latency
+goes over `--slo-ms`.
+
+Runs are seeded and start from empty cache and media directories, so the
+same command gives comparable numbers before and after a change:
+
+    python load_test.py --sessions 1,4,16,32 --flows 3 --json > before.jsonl
+    python load_test.py --sessions 1,4,16,32 --flows 3 --baseline before.jsonl
+"""
+import argparse
+import gc
+import json
+import logging
+import os
+import random
+import resource
+import socket
+import sys
+import tempfile
+import threading
+import time
+import urllib.request
+
+# The load test measures the app, not the project quota.
+os.environ.setdefault("GEMINI_TTS_RPM", "1000000")
+os.environ.setdefault("GEMINI_TTS_CPM", "1000000000")
+os.environ.setdefault("GOOGLE_CLOUD_TTS_RPM", "1000000")
+os.environ.setdefault("GOOGLE_CLOUD_TTS_CPM", "1000000000")
+os.environ.setdefault("TTS_USER_CHAR_BUDGET", "0")
+
+from streamlit.testing.v1 import AppTest
+
+from bench_tts import percentile, sample_text
+from metrics import REGISTRY, WAIT_BUCKETS
+from mock_engine import MockTTSBackend
+from tts_engines import ENGINES, LANGUAGES, use_mock_backend
+
+APP_PATH = os.path.join(os.path.dirname(os.path.abspath(__file__)), "app_streamlit.py")
+
+# AppTest swaps process-wide state (the Runtime singleton, config options)
+# for the duration of a run, so script runs are serialized. Background jobs,
+# engine calls and downloads still overlap. Waiting for the lock is timed
+# separately, so rerun latency does not grow with the number of sessions just
+# because this harness runs one script at a time.
+_run_lock = threading.Lock()
+
+
+# --- Measurements ---
+def rss_bytes():
+    try:
+        with open("/proc/self/statm") as f:
+            return int(f.read().split()[1]) * os.sysconf("SC_PAGE_SIZE")
+    except (OSError, ValueError):
+        # Peak rather than current RSS, in KiB on Linux.
+        return resource.getrusage(resource.RUSAGE_SELF).ru_maxrss * 1024
+
+
+def histogram_quantile(q, before, after):
+    """
+    Quantile `q` of the observations between two `queue_wait_snapshot()`s,
+    interpolated within buckets like Prometheus' histogram_quantile.
+    """
+    counts = [b - a for a, b in zip(before[0], after[0])]
+    total = after[1] - before[1]
+    if total <= 0:
+        return float("nan")
+    rank = q * total
+    lower, below = 0.0, 0
+    for bound, cumulative in zip(WAIT_BUCKETS, counts):
+        if cumulative >= rank:
+            share = (rank - below) / (cumulative - below) if cumulative > below else 1.0
+            return lower + (bound - lower) * share
+        lower, below = bound, cumulative
+    return WAIT_BUCKETS[-1]
+
+
+def wait_snapshots():
+    return {queue: REGISTRY.queue_wait_snapshot(queue) for queue in ["jobs"] + ENGINES}
+
+
+# --- Session ---
+class Session:
+    """
+    One simulated user: an AppTest plus the timings it collected.
+    """
+
+    def __init__(self, index, seed, timeout):
+        self.index = index
+        self.random = random.Random(seed * 1000 + index)
+        self.app = AppTest.from_file(APP_PATH, default_timeout=timeout)
+        self.reruns = []
+        self.lock_waits = []
+        self.flow_times = []
+        self.errors = 0
+        with _run_lock:
+            self.app.run()
+
+    def rerun(self):
+        queued = time.perf_counter()
+        with _run_lock:
+            started = time.perf_counter()
+            self.app.run()
+            self.reruns.append(time.perf_counter() - started)
+        self.lock_waits.append(started - queued)
+
+    def select(self, label, value):
+        for box in self.app.selectbox:
+            if box.label == label:
+                box.set_value(value)
+                self.rerun()
+                return
+
+    def finished(self):
+        if any('<div class="error-message">' in m.value for m in self.app.markdown):
+            return "error"
+        if any("complete in" in c.value for c in self.app.caption):
+            return "done"
+        return None
+
+    def download(self):
+        # With the media server on, downloads are plain HTTP links.
+        for button in self.app.get("link_button"):
+            with urllib.request.urlopen(button.proto.url, timeout=30) as response:
+                return len(response.read())
+        return 0
+
+    def run_flow(self, take, lengths, poll, flow_timeout):
+        self.select("TTS Engine", self.random.choice(ENGINES))
+        self.select("Language", self.random.choice(list(LANGUAGES.values())))
+        # A fresh script every take, so the audio cache does not short-circuit it.
+        text = sample_text(self.random.choice(lengths), f"{self.index}.{take}")
+        self.app.text_area[0].input(text)
+        self.rerun()
+        started = time.perf_counter()
+        self.app.button[0].click()
+        self.rerun()
+        state = self.finished()
+        while state is None and time.perf_counter() - started < flow_timeout:
+            time.sleep(poll)
+            self.rerun()
+            state = self.finished()
+        if state != "done" or self.app.exception:
+            self.errors += 1
+            return
+        self.download()
+        self.flow_times.append(time.perf_counter() - started)
+
+
+def run_level(sessions, args):
+    """
+    Open `sessions` sessions, run `args.flows` flows in each concurrently
+    and summarize the level.
+    """
+    gc.collect()
+    rss_before = rss_bytes()
+    opened = [Session(i, args.seed, args.timeout) for i in range(sessions)]
+    waits_before = wait_snapshots()
+    start = threading.Barrier(sessions)
+
+    def drive(session):
+        start.wait()
+        for take in range(args.flows):
+            try:
+                session.run_flow(take, args.lengths, args.poll, args.flow_timeout)
+            except Exception:
+                session.errors += 1
+
+    threads = [threading.Thread(target=drive, args=(s,), name=f"load-session-{s.index}") for s in opened]
+    started = time.perf_counter()
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    elapsed = time.perf_counter() - started
+    waits_after = wait_snapshots()
+    gc.collect()
+    rss_after = rss_bytes()
+
+    reruns = [t for s in opened for t in s.reruns]
+    lock_waits = [t for s in opened for t in s.lock_waits]
+    flows = [t for s in opened for t in s.flow_times]
+    job_wait = (waits_before["jobs"], waits_after["jobs"])
+    # Engine slot waits for whichever engines the sessions picked.
+    slot_before = [sum(x) for x in zip(*(waits_before[e][0] for e in ENGINES))]
+    slot_after = [sum(x) for x in zip(*(waits_after[e][0] for e in ENGINES))]
+    slot_wait = (
+        (slot_before, sum(waits_before[e][1] for e in ENGINES)),
+        (slot_after, sum(waits_after[e][1] for e in ENGINES)),
+    )
+    return {
+        "sessions": sessions,
+        "flows": len(flows),
+        "errors": sum(s.errors for s in opened),
+        "rerun_p50": percentile(reruns, 50),
+        "rerun_p95": percentile(reruns, 95),
+        "rerun_p99": percentile(reruns, 99),
+        "lock_wait_p95": percentile(lock_waits, 95),
+        "flow_p50": percentile(flows, 50),
+        "flow_p95": percentile(flows, 95),
+        "job_wait_p50": histogram_quantile(0.5, *job_wait),
+        "job_wait_p95": histogram_quantile(0.95, *job_wait),
+        "slot_wait_p95": histogram_quantile(0.95, *slot_wait),
+        "rss_mb_per_session": (rss_after - rss_before) / sessions / (1024 * 1024),
+        "rss_mb": rss_after / (1024 * 1024),
+        "flows_per_s": len(flows) / elapsed if elapsed else 0.0,
+    }
+
+
+def mark_saturation(rows, slo_ms, min_gain=0.1):
+    """
+    Flag the first level where throughput grew by less than `min_gain` over
+    the best level so far, or p95 rerun latency exceeded `slo_ms`.
+    """
+    best = 0.0
+    for row in rows:
+        if row["rerun_p95"] * 1000 > slo_ms:
+            row["saturated"] = f"p95 rerun over {slo_ms:.0f} ms"
+            return row
+        if best and row["flows_per_s"] < best * (1 + min_gain):
+            row["saturated"] = "throughput stopped scaling"
+            return row
+        best = max(best, row["flows_per_s"])
+    return None
+
+
+def format_table(rows, baseline=None):
+    header = (
+        f"{'sess':>5} {'flows':>6} {'err':>4} {'rr50ms':>7} {'rr95ms':>7} {'rr99ms':>7} {'lock95':>7} "
+        f"{'flow50':>7} {'flow95':>7} {'jobw50':>7} {'jobw95':>7} {'slot95':>7} "
+        f"{'MB/sess':>8} {'RSS MB':>7} {'flows/s':>8}"
+    )
+    lines = [header, "-" * len(header)]
+    for r in rows:
+        lines.append(
+            f"{r['sessions']:>5} {r['flows']:>6} {r['errors']:>4} "
+            f"{r['rerun_p50'] * 1000:>7.1f} {r['rerun_p95'] * 1000:>7.1f} {r['rerun_p99'] * 1000:>7.1f} "
+            f"{r['lock_wait_p95'] * 1000:>7.1f} "
+            f"{r['flow_p50']:>7.2f} {r['flow_p95']:>7.2f} "
+            f"{r['job_wait_p50']:>7.3f} {r['job_wait_p95']:>7.3f} {r['slot_wait_p95']:>7.3f} "
+            f"{r['rss_mb_per_session']:>8.2f} {r['rss_mb']:>7.1f} {r['flows_per_s']:>8.2f}"
+        )
+        before = (baseline or {}).get(r["sessions"])
+        if before:
+            lines.append(
+                f"{'vs':>5} {'':>6} {'':>4} {'':>7} {_delta(r, before, 'rerun_p95'):>7} {'':>7} {'':>7} "
+                f"{'':>7} {_delta(r, before, 'flow_p95'):>7} {'':>7} {_delta(r, before, 'job_wait_p95'):>7} "
+                f"{'':>7} {_delta(r, before, 'rss_mb_per_session'):>8} {'':>7} {_delta(r, before, 'flows_per_s'):>8}"
+            )
+    return "\n".join(lines)
+
+
+def _delta(row, before, key):
+    if not before.get(key):
+        return "-"
+    return f"{(row[key] / before[key] - 1) * 100:+.0f}%"
+
+
+def load_baseline(path):
+    with open(path, encoding="utf-8") as f:
+        rows = [json.loads(line) for line in f if line.strip()]
+    return {row["sessions"]: row for row in rows}
+
+
+def _int_list(value):
+    return [int(v) for v in value.split(",") if v]
+
+
+def _free_port():
+    with socket.socket() as s:
+        s.bind(("127.0.0.1", 0))
+        return s.getsockname()[1]
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Load-test the Streamlit app with concurrent headless sessions.")
+    parser.add_argument("--sessions", type=_int_list, default=[1, 4, 16], help="concurrent sessions per level")
+    parser.add_argument("--flows", type=int, default=3, help="generate-and-download flows per session")
+    parser.add_argument("--lengths", type=_int_list, default=[200, 1000, 3000], help="script lengths in chars")
+    parser.add_argument("--latency", type=float, default=0.3, help="mock upstream latency in seconds")
+    parser.add_argument("--jitter", type=float, default=0.1, help="mock latency jitter in seconds")
+    parser.add_argument("--error-rate", type=float, default=0.0, help="mock transient error rate")
+    parser.add_argument("--per-char-latency", type=float, default=0.0005, help="extra mock latency per char")
+    parser.add_argument("--poll", type=float, default=0.5, help="seconds between polling reruns")
+    parser.add_argument("--timeout", type=float, default=60, help="seconds allowed for one rerun")
+    parser.add_argument("--flow-timeout", type=float, default=300, help="seconds allowed for one generation")
+    parser.add_argument("--slo-ms", type=float, default=500, help="p95 rerun latency that counts as saturated")
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--json", action="store_true", help="print one JSON object per level")
+    parser.add_argument("--baseline", help="JSON lines from an earlier --json run to compare against")
+    args = parser.parse_args(argv)
+    # Slow reruns are what is being measured; don't log each one. AppTest also
+    # warns about a missing run context for every session it creates.
+    logging.getLogger("tts.rerun").setLevel(logging.ERROR)
+    logging.getLogger("streamlit.runtime.scriptrunner_utils.script_run_context").addFilter(lambda record: False)
+
+    # Fresh stores every run so results do not depend on what earlier runs cached.
+    work_dir = tempfile.mkdtemp(prefix="tts-load-")
+    os.environ["AUDIO_CACHE_DIR"] = os.path.join(work_dir, "cache")
+    os.environ["MEDIA_STORE_DIR"] = os.path.join(work_dir, "media")
+    media_port = _free_port()
+    os.environ["TTS_MEDIA_PORT"] = str(media_port)
+    os.environ["TTS_MEDIA_URL"] = f"http://127.0.0.1:{media_port}"
+    os.environ.pop("TTS_PREWARM_PHRASES", None)
+    os.environ.pop("TTS_PHRASE_LOG", None)
+    backend = MockTTSBackend(
+        latency=args.latency, jitter=args.jitter, error_rate=args.error_rate,
+        per_char_latency=args.per_char_latency, seed=args.seed,
+    )
+    use_mock_backend(backend)
+
+    # One unreported flow first, so imports and shared resources created on
+    # first use don't count as per-session growth.
+    Session(-1, args.seed, args.timeout).run_flow(0, args.lengths[:1], args.poll, args.flow_timeout)
+
+    rows = []
+    for sessions in args.sessions:
+        row = run_level(sessions, args)
+        rows.append(row)
+    saturated = mark_saturation(rows, args.slo_ms)
+
+    if args.json:
+        for row in rows:
+            print(json.dumps(row))
+        return 0
+    print(format_table(rows, load_baseline(args.baseline) if args.baseline else None))
+    print("\nscript runs are serialized across sessions: rr* is time in the run, lock95 the p95 wait for another session's run (ms)")
+    if saturated:
+        print(f"\nsaturation: {saturated['sessions']} sessions ({saturated['saturated']})")
+    else:
+        print(f"\nsaturation: not reached up to {rows[-1]['sessions']} sessions")
+    print(f"mock upstream calls: {backend.calls}")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
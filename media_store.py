@@ -0,0 +1,184 @@
+"""
+File-backed store for generated audio.
+
+Audio is written once to disk under its content hash and served from there
+by a small HTTP server with Range support, so players can seek and the
+Streamlit session only holds a URL instead of the clip's bytes.
+"""
+import hashlib
+import os
+import re
+import threading
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import parse_qs, quote, urlsplit
+
+from audio_cache import DiskLRU
+
+MIME_TYPES = {
+    "mp3": "audio/mpeg",
+    "ogg": "audio/ogg",
+    "wav": "audio/wav",
+}
+
+_MEDIA_PATH = re.compile(r"^/media/([0-9a-f]{64})\.(\w+)$")
+_RANGE = re.compile(r"^bytes=(\d*)-(\d*)$")
+_BLOCK_BYTES = 64 * 1024
+
+
+# --- Media Store ---
+class MediaStore:
+    """
+    Content-addressed audio files in `root`, named `<sha256>.<ext>`.
+
+    Identical audio is stored once. When the store grows past `max_bytes`
+    the least recently written files are removed (see `DiskLRU`).
+    """
+
+    def __init__(self, root=".media", max_bytes=2 * 1024 * 1024 * 1024, base_url=None):
+        self.root = root
+        self.max_bytes = max_bytes
+        self.base_url = base_url
+        os.makedirs(root, exist_ok=True)
+        self._index = DiskLRU(root, max_bytes, include=lambda name: not name.endswith(".tmp"))
+
+    def path(self, media_id):
+        return os.path.join(self.root, media_id)
+
+    def put(self, audio, ext="mp3"):
+        """
+        Store `audio` and return its media id (`<sha256>.<ext>`).
+        """
+        media_id = f"{hashlib.sha256(audio).hexdigest()}.{ext}"
+        path = self.path(media_id)
+        if os.path.exists(path):
+            # Already stored; refresh the mtime so eviction keeps it.
+            os.utime(path)
+            self._index.touch(media_id, len(audio))
+            return media_id
+        tmp_path = f"{path}.{os.getpid()}.{threading.get_ident()}.tmp"
+        with open(tmp_path, "wb") as f:
+            f.write(audio)
+        os.replace(tmp_path, path)
+        self._index.touch(media_id, len(audio))
+        return media_id
+
+    def read(self, media_id):
+        """
+        The stored bytes, or None if the file was evicted.
+        """
+        try:
+            with open(self.path(media_id), "rb") as f:
+                return f.read()
+        except FileNotFoundError:
+            return None
+
+    def exists(self, media_id):
+        return os.path.exists(self.path(media_id))
+
+    def url(self, media_id, download_name=None):
+        url = f"{self.base_url.rstrip('/')}/media/{media_id}"
+        if download_name:
+            url += f"?download={quote(download_name)}"
+        return url
+
+
+# --- HTTP Server ---
+def parse_range(header, size):
+    """
+    Parse a single-range `Range` header into inclusive `(start, end)`.
+    Returns None for a missing or multi-range header (serve the whole file)
+    and raises ValueError when the range cannot be satisfied.
+    """
+    if not header:
+        return None
+    match = _RANGE.match(header.strip())
+    if not match:
+        return None
+    first, last = match.groups()
+    if not first and not last:
+        return None
+    if not first:
+        # Suffix range: the last N bytes.
+        length = int(last)
+        if length == 0:
+            raise ValueError(header)
+        return max(0, size - length), size - 1
+    start = int(first)
+    end = min(int(last), size - 1) if last else size - 1
+    if start >= size or start > end:
+        raise ValueError(header)
+    return start, end
+
+
+class _MediaHandler(BaseHTTPRequestHandler):
+    store = None
+
+    def do_HEAD(self):
+        self._serve(send_body=False)
+
+    def do_GET(self):
+        self._serve(send_body=True)
+
+    def _serve(self, send_body):
+        url = urlsplit(self.path)
+        match = _MEDIA_PATH.match(url.path)
+        if not match:
+            self.send_error(404)
+            return
+        media_id = f"{match.group(1)}.{match.group(2)}"
+        try:
+            f = open(self.store.path(media_id), "rb")
+        except FileNotFoundError:
+            self.send_error(404)
+            return
+        with f:
+            size = os.fstat(f.fileno()).st_size
+            try:
+                byte_range = parse_range(self.headers.get("Range"), size)
+            except ValueError:
+                self.send_response(416)
+                self.send_header("Content-Range", f"bytes */{size}")
+                self.send_header("Content-Length", "0")
+                self.end_headers()
+                return
+            start, end = byte_range or (0, size - 1)
+            self.send_response(206 if byte_range else 200)
+            if byte_range:
+                self.send_header("Content-Range", f"bytes {start}-{end}/{size}")
+            self.send_header("Content-Type", MIME_TYPES.get(match.group(2), "application/octet-stream"))
+            self.send_header("Content-Length", str(end - start + 1))
+            self.send_header("Accept-Ranges", "bytes")
+            # Content-addressed, so the bytes behind a URL never change.
+            self.send_header("Cache-Control", "public, max-age=31536000, immutable")
+            download = parse_qs(url.query).get("download")
+            if download:
+                filename = os.path.basename(download[0]).replace('"', "")
+                self.send_header("Content-Disposition", f'attachment; filename="{filename}"')
+            self.end_headers()
+            if not send_body:
+                return
+            f.seek(start)
+            remaining = end - start + 1
+            try:
+                while remaining > 0:
+                    block = f.read(min(_BLOCK_BYTES, remaining))
+                    if not block:
+                        break
+                    self.wfile.write(block)
+                    remaining -= len(block)
+            except (BrokenPipeError, ConnectionResetError):
+                # Players routinely drop a connection after seeking.
+                pass
+
+    def log_message(self, format, *args):
+        pass
+
+
+def start_media_server(store, port, host="127.0.0.1"):
+    """
+    Serve `store` at /media/<id> on a daemon thread. Returns the server.
+    """
+    handler = type("MediaHandler", (_MediaHandler,), {"store": store})
+    server = ThreadingHTTPServer((host, port), handler)
+    threading.Thread(target=server.serve_forever, name="tts-media", daemon=True).start()
+    return server
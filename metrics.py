@@ -0,0 +1,219 @@
+import json
+import logging
+import threading
+import time
+from collections import defaultdict
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+logger = logging.getLogger("tts.metrics")
+phrase_logger = logging.getLogger("tts.phrases")
+
+LATENCY_BUCKETS = (0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0, 60.0)
+RERUN_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0)
+WAIT_BUCKETS = (0.01, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0, 60.0, 300.0)
+
+
+# --- Metrics Registry ---
+class Histogram:
+    def __init__(self, buckets):
+        self.buckets = buckets
+        self.counts = [0] * len(buckets)
+        self.count = 0
+        self.sum = 0.0
+
+    def observe(self, value):
+        self.count += 1
+        self.sum += value
+        for i, bound in enumerate(self.buckets):
+            if value <= bound:
+                self.counts[i] += 1
+
+
+class MetricsRegistry:
+    """
+    Counters and latency histograms for synthesis requests, keyed by label
+    tuples. Rendered in Prometheus text exposition format.
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.requests = defaultdict(int)        # (engine, cache, error_class) -> count
+        self.characters = defaultdict(int)      # (engine,) -> chars sent upstream
+        self.audio_bytes = defaultdict(int)     # (engine,) -> bytes returned
+        self.retries = defaultdict(int)         # (engine,) -> retry attempts
+        self.latency = {}                       # (engine, cache) -> Histogram
+        self.rerun = Histogram(RERUN_BUCKETS)   # Streamlit reruns without synthesis
+        self.queue_wait = {}                    # (queue,) -> Histogram; "jobs" or an engine's call slots
+
+    def record(self, record):
+        engine = record["engine"]
+        with self._lock:
+            self.requests[(engine, record["cache"], record["error_class"] or "")] += 1
+            if record["cache"] not in ("hit", "shared"):
+                self.characters[(engine,)] += record["chars"]
+            self.audio_bytes[(engine,)] += record["audio_bytes"]
+            self.retries[(engine,)] += record["retries"]
+            key = (engine, record["cache"])
+            if key not in self.latency:
+                self.latency[key] = Histogram(LATENCY_BUCKETS)
+            self.latency[key].observe(record["latency"])
+
+    def observe_rerun(self, seconds):
+        with self._lock:
+            self.rerun.observe(seconds)
+
+    def observe_queue_wait(self, queue, seconds):
+        with self._lock:
+            key = (queue,)
+            if key not in self.queue_wait:
+                self.queue_wait[key] = Histogram(WAIT_BUCKETS)
+            self.queue_wait[key].observe(seconds)
+
+    def queue_wait_snapshot(self, queue):
+        """
+        `(cumulative bucket counts, count, sum)` of one queue's wait histogram.
+        """
+        with self._lock:
+            hist = self.queue_wait.get((queue,))
+            if hist is None:
+                return [0] * len(WAIT_BUCKETS), 0, 0.0
+            return list(hist.counts), hist.count, hist.sum
+
+    def render_prometheus(self):
+        lines = []
+
+        def histogram(name, hist, base=""):
+            prefix = f"{base}," if base else ""
+            for bound, count in zip(hist.buckets, hist.counts):
+                lines.append(f'{name}_bucket{{{prefix}le="{bound}"}} {count}')
+            lines.append(f'{name}_bucket{{{prefix}le="+Inf"}} {hist.count}')
+            labels = f"{{{base}}}" if base else ""
+            lines.append(f"{name}_sum{labels} {hist.sum}")
+            lines.append(f"{name}_count{labels} {hist.count}")
+
+        def counter(name, help_text, values, label_names):
+            lines.append(f"# HELP {name} {help_text}")
+            lines.append(f"# TYPE {name} counter")
+            for labels, value in sorted(values.items()):
+                lines.append(f"{name}{{{_labels(label_names, labels)}}} {value}")
+
+        with self._lock:
+            counter("tts_requests_total", "Synthesis requests.", self.requests, ("engine", "cache", "error_class"))
+            counter("tts_characters_total", "Characters sent upstream.", self.characters, ("engine",))
+            counter("tts_audio_bytes_total", "Audio bytes returned.", self.audio_bytes, ("engine",))
+            counter("tts_retries_total", "Upstream retry attempts.", self.retries, ("engine",))
+
+            name = "tts_request_latency_seconds"
+            lines.append(f"# HELP {name} Synthesis request latency.")
+            lines.append(f"# TYPE {name} histogram")
+            for labels, hist in sorted(self.latency.items()):
+                histogram(name, hist, _labels(("engine", "cache"), labels))
+
+            name = "tts_rerun_seconds"
+            lines.append(f"# HELP {name} Streamlit script rerun time, excluding synthesis.")
+            lines.append(f"# TYPE {name} histogram")
+            histogram(name, self.rerun)
+
+            name = "tts_queue_wait_seconds"
+            lines.append(f"# HELP {name} Time spent waiting for a job worker or an engine call slot.")
+            lines.append(f"# TYPE {name} histogram")
+            for labels, hist in sorted(self.queue_wait.items()):
+                histogram(name, hist, _labels(("queue",), labels))
+        return "\n".join(lines) + "\n"
+
+
+def _escape(value):
+    return str(value).replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n")
+
+
+def _labels(names, values):
+    return ",".join(f'{name}="{_escape(value)}"' for name, value in zip(names, values))
+
+
+REGISTRY = MetricsRegistry()
+
+
+def record_synthesis(engine, model, chars, latency, audio_bytes=0, cache="none", retries=0, error=None):
+    """
+    Record one synthesis request in the registry and emit it as a JSON log line.
+    `cache` is "hit", "miss", "none" (no cache in front of the call) or
+    "shared" (coalesced onto an identical request already in flight).
+    """
+    record = {
+        "ts": time.time(),
+        "engine": engine,
+        "model": model,
+        "chars": chars,
+        "latency": round(latency, 4),
+        "audio_bytes": audio_bytes,
+        "chars_per_second": round(chars / latency, 1) if latency > 0 else None,
+        "cache": cache,
+        "retries": retries,
+        "error_class": type(error).__name__ if error else None,
+    }
+    REGISTRY.record(record)
+    logger.info(json.dumps(record))
+    return record
+
+
+def record_phrase(engine, language, voice, speed, pitch, audio_format, text):
+    """
+    Log the text of one synthesis request for cache pre-warming. Off unless
+    `configure_phrase_log` was called, since it records user text.
+    """
+    if not phrase_logger.isEnabledFor(logging.INFO):
+        return
+    phrase_logger.info(json.dumps({
+        "ts": time.time(), "engine": engine, "language": language, "voice": voice,
+        "speed": speed, "pitch": pitch, "format": audio_format, "text": text,
+    }, ensure_ascii=False))
+
+
+# --- Export ---
+def configure_metrics_log(path):
+    """
+    Append one JSON line per synthesis request to `path`.
+    """
+    handler = logging.FileHandler(path, encoding="utf-8")
+    handler.setFormatter(logging.Formatter("%(message)s"))
+    logger.addHandler(handler)
+    logger.setLevel(logging.INFO)
+    return handler
+
+
+def configure_phrase_log(path):
+    """
+    Append one JSON line per synthesis request, including its text, to `path`.
+    """
+    handler = logging.FileHandler(path, encoding="utf-8")
+    handler.setFormatter(logging.Formatter("%(message)s"))
+    phrase_logger.addHandler(handler)
+    phrase_logger.setLevel(logging.INFO)
+    # Keep request text out of application logs.
+    phrase_logger.propagate = False
+    return handler
+
+
+class _MetricsHandler(BaseHTTPRequestHandler):
+    def do_GET(self):
+        if self.path.split("?")[0] != "/metrics":
+            self.send_error(404)
+            return
+        body = REGISTRY.render_prometheus().encode("utf-8")
+        self.send_response(200)
+        self.send_header("Content-Type", "text/plain; version=0.0.4; charset=utf-8")
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, format, *args):
+        pass
+
+
+def start_metrics_server(port, host="127.0.0.1"):
+    """
+    Serve /metrics for Prometheus on a daemon thread. Returns the server.
+    """
+    server = ThreadingHTTPServer((host, port), _MetricsHandler)
+    threading.Thread(target=server.serve_forever, name="tts-metrics", daemon=True).start()
+    return server
@@ -0,0 +1,81 @@
+import hashlib
+import os
+import random
+import threading
+import time
+
+from resilience import TransientError
+
+# One silent MPEG-1 Layer III frame: 128 kbps, 44.1 kHz, no padding. An
+# all-zero side info block decodes to silence, so concatenated frames form
+# a valid MP3 of any length.
+_FRAME_HEADER = b"\xff\xfb\x90\x64"
+_FRAME_BYTES = 417
+_FRAMES_PER_SECOND = 44100 / 1152
+_SILENT_FRAME = _FRAME_HEADER + b"\x00" * (_FRAME_BYTES - len(_FRAME_HEADER))
+
+# Roughly how fast a narrator reads.
+CHARS_PER_SECOND = 15
+
+
+# --- Mock Backend ---
+class MockTTSBackend:
+    """
+    Local stand-in for the Gemini and Cloud TTS APIs.
+
+    Returns silent MP3 audio whose duration is proportional to the text, after
+    sleeping `latency` (+/- `jitter`) seconds, and fails with a TransientError
+    at `error_rate`. The same text always yields the same bytes.
+    """
+
+    def __init__(self, latency=0.3, jitter=0.1, error_rate=0.0, per_char_latency=0.0, seed=None):
+        self.latency = latency
+        self.jitter = jitter
+        self.error_rate = error_rate
+        self.per_char_latency = per_char_latency
+        self.calls = 0
+        self._random = random.Random(seed)
+        self._lock = threading.Lock()
+
+    def _delay(self, text):
+        with self._lock:
+            self.calls += 1
+            jitter = self._random.uniform(-self.jitter, self.jitter)
+            failed = self._random.random() < self.error_rate
+        return max(0.0, self.latency + jitter + self.per_char_latency * len(text)), failed
+
+    def synthesize(self, engine, text, voice, speed=1.0, pitch=0.0):
+        """
+        Same contract as the real engine functions: returns `(audio, error)`.
+        """
+        delay, failed = self._delay(text)
+        time.sleep(delay)
+        if failed:
+            return None, TransientError(f"{engine} mock: simulated upstream failure", engine)
+        return mock_audio(text, speed), None
+
+
+def mock_audio(text, speed=1.0):
+    """
+    Deterministic silent MP3 lasting about as long as reading `text` aloud.
+    """
+    seconds = max(0.1, len(text) / CHARS_PER_SECOND / max(speed, 0.25))
+    frames = max(1, round(seconds * _FRAMES_PER_SECOND))
+    # An ID3v1 tag carrying a hash of the text keeps different texts distinguishable.
+    title = hashlib.sha256(text.encode("utf-8")).hexdigest()[:30].encode("ascii")
+    tag = b"TAG" + title + b"\x00" * 94 + b"\xff"
+    return _SILENT_FRAME * frames + tag
+
+
+def backend_from_env():
+    """
+    Build a MockTTSBackend when TTS_MOCK_BACKEND is set, else return None.
+    Tuned with TTS_MOCK_LATENCY, TTS_MOCK_JITTER and TTS_MOCK_ERROR_RATE.
+    """
+    if os.environ.get("TTS_MOCK_BACKEND", "").lower() not in ("1", "true", "yes"):
+        return None
+    return MockTTSBackend(
+        latency=float(os.environ.get("TTS_MOCK_LATENCY", "0.3")),
+        jitter=float(os.environ.get("TTS_MOCK_JITTER", "0.1")),
+        error_rate=float(os.environ.get("TTS_MOCK_ERROR_RATE", "0")),
+    )
@@ -0,0 +1,195 @@
+"""
+Pre-warm the audio cache with phrases we know will be requested.
+
+Sources are a hot-phrase file (intros, disclaimers, outros) and the phrase
+log of past requests (TTS_PHRASE_LOG), from which the most frequent segments
+are taken. Each phrase is synthesized for every engine/language/voice/format
+combination in use and written to the disk tier of the cache. Warm-up runs
+on one background thread, one request at a time, and waits whenever live
+generation is in progress.
+
+Hot-phrase file:
+
+    {
+      "phrases": {"en-US": ["Welcome to Hanyaa Narration."], "hi-IN": ["..."]},
+      "voices": [{"engine": "Google Cloud TTS", "language": "en-US", "voice": "en-US-Wavenet-D"}]
+    }
+
+    python prewarm.py --phrases hot_phrases.json --log phrases.jsonl --top 200
+"""
+import argparse
+import json
+import logging
+import os
+import sys
+import threading
+import time
+from collections import Counter
+
+from audio_cache import AudioCache, make_cache_key
+from scheduler import BACKGROUND
+from text_normalization import segment_text
+from tts_engines import call_engine, default_voice, model_for, native_format
+
+logger = logging.getLogger("tts.prewarm")
+
+
+# --- Planning ---
+# Fields every phrase-log entry and hot-phrase voice must carry.
+_LOG_FIELDS = ("engine", "language", "voice", "text")
+_VOICE_FIELDS = ("engine", "language")
+
+
+def _has_fields(entry, fields):
+    return isinstance(entry, dict) and all(isinstance(entry.get(name), str) for name in fields)
+
+
+def load_hot_phrases(path):
+    with open(path, encoding="utf-8") as f:
+        data = json.load(f)
+    voices = data.get("voices", [])
+    valid = [v for v in voices if _has_fields(v, _VOICE_FIELDS)]
+    if len(valid) < len(voices):
+        logger.warning("Skipping %d hot-phrase voice(s) without an engine and language", len(voices) - len(valid))
+    return data.get("phrases", {}), valid
+
+
+def read_phrase_log(path):
+    """
+    Count `(engine, language, voice, format, text)` requests in a phrase log.
+    Lines that are not JSON or lack a field are skipped.
+    """
+    counts = Counter()
+    try:
+        with open(path, encoding="utf-8") as f:
+            for line in f:
+                try:
+                    r = json.loads(line)
+                except ValueError:
+                    continue
+                if not _has_fields(r, _LOG_FIELDS):
+                    continue
+                if r.get("speed", 1.0) != 1.0 or r.get("pitch", 0.0) != 0.0:
+                    continue
+                counts[(r["engine"], r["language"], r["voice"], r.get("format", "MP3"), r["text"])] += 1
+    except FileNotFoundError:
+        pass
+    return counts
+
+
+def plan_prewarm(phrases_path=None, log_path=None, top=200):
+    """
+    The ordered, de-duplicated list of `(engine, language, voice, format,
+    text)` to warm: hot phrases for every combination in use, then the `top`
+    most frequent logged segments.
+    """
+    phrases, voices = load_hot_phrases(phrases_path) if phrases_path else ({}, [])
+    counts = read_phrase_log(log_path) if log_path else Counter()
+
+    combos = {
+        (v["engine"], v["language"], v.get("voice") or default_voice(v["engine"], v["language"]), v.get("format", "MP3"))
+        for v in voices
+    }
+    combos |= {key[:4] for key in counts}
+
+    tasks = []
+    for engine, language, voice, audio_format in sorted(combos):
+        for phrase in phrases.get(language, []):
+            # Same segmentation as live requests, so the cache keys match.
+            for chunk in segment_text(phrase, language, engine):
+                tasks.append((engine, language, voice, audio_format, chunk))
+    tasks += [key for key, _ in counts.most_common(top)]
+    return list(dict.fromkeys(tasks))
+
+
+# --- Warm-up ---
+class PreWarmer:
+    """
+    Synthesizes planned phrases into `cache` one at a time. Before each
+    request it waits until `is_idle()` is true, and it sleeps `pause`
+    seconds between requests so live traffic keeps the rate-limit headroom.
+    """
+
+    def __init__(self, cache, is_idle=None, pause=1.0, idle_poll=0.5):
+        self.cache = cache
+        self.is_idle = is_idle or (lambda: True)
+        self.pause = pause
+        self.idle_poll = idle_poll
+
+    def _wait_for_idle(self):
+        while not self.is_idle():
+            time.sleep(self.idle_poll)
+
+    def run(self, tasks):
+        stats = {"warmed": 0, "cached": 0, "failed": 0}
+        for engine, language, voice, audio_format, text in tasks:
+            # Live requests ask the engine for its native format and transcode
+            # afterwards, so that is what their cache keys hold.
+            audio_format = native_format(engine, audio_format)
+            key = make_cache_key(engine, model_for(engine), language, voice, 1.0, 0.0, text, audio_format)
+            if self.cache.contains(key):
+                stats["cached"] += 1
+                continue
+            self._wait_for_idle()
+            audio, error = call_engine(engine, text, voice, audio_format=audio_format, flow="prewarm", priority=BACKGROUND)
+            if error or not audio:
+                stats["failed"] += 1
+                logger.warning("Pre-warm failed for %s/%s: %s", engine, voice, error)
+            else:
+                self.cache.put(key, audio, memory=False)
+                stats["warmed"] += 1
+            time.sleep(self.pause)
+        logger.info("Pre-warm finished: %s", stats)
+        return stats
+
+
+def start_prewarmer(cache, phrases_path=None, log_path=None, top=200, every_seconds=None, **kwargs):
+    """
+    Warm the cache on a daemon thread now and, if `every_seconds` is set,
+    again on that schedule (picking up new log entries).
+    """
+    warmer = PreWarmer(cache, **kwargs)
+
+    def loop():
+        while True:
+            try:
+                warmer.run(plan_prewarm(phrases_path, log_path, top))
+            except Exception:
+                logger.exception("Pre-warm crashed")
+            if not every_seconds:
+                return
+            time.sleep(every_seconds)
+
+    thread = threading.Thread(target=loop, name="tts-prewarm", daemon=True)
+    thread.start()
+    return thread
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Pre-synthesize hot phrases into the audio cache.")
+    parser.add_argument("--phrases", help="hot-phrase JSON file")
+    parser.add_argument("--log", help="phrase log (TTS_PHRASE_LOG) to mine for frequent segments")
+    parser.add_argument("--top", type=int, default=200, help="most frequent logged segments to warm")
+    parser.add_argument("--cache-dir", default=os.environ.get("AUDIO_CACHE_DIR", ".audio_cache"))
+    parser.add_argument("--pause", type=float, default=0.0, help="seconds between requests")
+    parser.add_argument("--dry-run", action="store_true", help="list what would be warmed")
+    args = parser.parse_args(argv)
+    if not args.phrases and not args.log:
+        parser.error("give --phrases and/or --log")
+    logging.basicConfig(level=logging.INFO)
+    if os.environ.get("GOOGLE_API_KEY"):
+        import google.generativeai as genai
+        genai.configure(api_key=os.environ["GOOGLE_API_KEY"])
+
+    tasks = plan_prewarm(args.phrases, args.log, args.top)
+    if args.dry_run:
+        for task in tasks:
+            print(json.dumps(task, ensure_ascii=False))
+        return 0
+    stats = PreWarmer(AudioCache(cache_dir=args.cache_dir), pause=args.pause).run(tasks)
+    print(json.dumps(stats))
+    return 0 if stats["failed"] == 0 else 1
+
+
+if __name__ == "__main__":
+    sys.exit(main())
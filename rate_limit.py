@@ -0,0 +1,126 @@
+import os
+import threading
+import time
+
+# Default per-engine quotas (requests and characters per minute). Override
+# with e.g. GEMINI_TTS_RPM / GEMINI_TTS_CPM to match your project's quota.
+DEFAULT_QUOTAS = {
+    "Gemini TTS": {"rpm": 60, "cpm": 60000},
+    "Google Cloud TTS": {"rpm": 1000, "cpm": 150000},
+}
+
+
+# --- Token Bucket ---
+class TokenBucket:
+    """
+    Thread-safe token bucket refilled at `rate_per_minute`.
+
+    Callers reserve tokens up front (the balance may go negative) and then
+    sleep off the debt, so waiters are served in arrival order without
+    polling.
+    """
+
+    def __init__(self, rate_per_minute, burst_seconds=10):
+        self.rate = rate_per_minute / 60.0
+        self.capacity = max(1.0, self.rate * burst_seconds)
+        self._tokens = self.capacity
+        self._updated = time.monotonic()
+        self._lock = threading.Lock()
+
+    def _refill(self):
+        # Caller holds the lock.
+        now = time.monotonic()
+        self._tokens = min(self.capacity, self._tokens + (now - self._updated) * self.rate)
+        self._updated = now
+
+    def reserve(self, amount=1):
+        """
+        Take `amount` tokens and return how many seconds to wait before using them.
+        """
+        # A single request larger than the bucket would otherwise never fit.
+        amount = min(amount, self.capacity)
+        with self._lock:
+            self._refill()
+            self._tokens -= amount
+            return max(0.0, -self._tokens / self.rate)
+
+    def try_take(self, amount):
+        """
+        Take `amount` tokens only if the balance covers them. Returns 0 when
+        taken, else the seconds until it would (nothing is taken).
+        """
+        with self._lock:
+            self._refill()
+            if self._tokens >= amount:
+                self._tokens -= amount
+                return 0.0
+            return (amount - self._tokens) / self.rate
+
+    def give_back(self, amount):
+        """
+        Return `amount` tokens that were taken but not used.
+        """
+        with self._lock:
+            self._refill()
+            self._tokens = min(self.capacity, self._tokens + amount)
+
+    def available(self):
+        with self._lock:
+            self._refill()
+            return max(0.0, self._tokens)
+
+    def acquire(self, amount=1):
+        time.sleep(self.reserve(amount))
+
+
+class EngineRateLimiter:
+    """
+    Requests-per-minute and characters-per-minute buckets for one engine.
+
+    A full bucket admits `burst_seconds` of quota at once, so the buckets
+    refill at `quota * 60 / (60 + burst_seconds)` per minute: burst plus
+    refill then never exceed the quota in any 60 s window.
+    """
+
+    def __init__(self, rpm, cpm, burst_seconds=10):
+        scale = 60.0 / (60.0 + burst_seconds)
+        self.requests = TokenBucket(rpm * scale, burst_seconds)
+        self.characters = TokenBucket(cpm * scale, burst_seconds)
+
+    def acquire(self, chars):
+        time.sleep(max(self.requests.reserve(1), self.characters.reserve(chars)))
+
+
+# --- Registry ---
+_limiters = {}
+_limiters_lock = threading.Lock()
+
+
+def _env_name(engine, suffix):
+    return engine.upper().replace(" ", "_") + "_" + suffix
+
+
+def quota_sharers():
+    """
+    Number of processes splitting each engine quota: TTS_WORKER_TOTAL in
+    worker processes (see `worker_pool`), else 1.
+    """
+    return max(1, int(os.environ.get("TTS_WORKER_TOTAL", "1")))
+
+
+def get_rate_limiter(engine):
+    """
+    Process-wide limiter for `engine`, shared by the UI and batch paths.
+    Worker processes each get an equal share of the quota.
+    """
+    with _limiters_lock:
+        limiter = _limiters.get(engine)
+        if limiter is None:
+            quota = DEFAULT_QUOTAS.get(engine, {"rpm": 60, "cpm": 60000})
+            sharers = quota_sharers()
+            limiter = EngineRateLimiter(
+                rpm=float(os.environ.get(_env_name(engine, "RPM"), quota["rpm"])) / sharers,
+                cpm=float(os.environ.get(_env_name(engine, "CPM"), quota["cpm"])) / sharers,
+            )
+            _limiters[engine] = limiter
+        return limiter
@@ -0,0 +1,170 @@
+import random
+import threading
+import time
+
+
+# --- Error Classes ---
+class TTSError(Exception):
+    """
+    Base class for synthesis errors. Engine functions return these as the
+    `error` half of `(audio, error)`; `str(error)` is the user-facing message.
+    """
+
+    retryable = False
+
+    def __init__(self, message, engine=None):
+        super().__init__(message)
+        self.engine = engine
+
+
+class AuthError(TTSError):
+    """Invalid API key, missing credentials or no access to the model."""
+
+
+class InvalidRequestError(TTSError):
+    """The request itself is wrong (unsupported voice, format, too long...)."""
+
+
+class NoAudioError(TTSError):
+    """The engine answered but returned no audio (e.g. a safety block)."""
+
+
+class QuotaError(TTSError):
+    """Rate limit or quota exhausted (HTTP 429)."""
+
+    retryable = True
+
+
+class TransientError(TTSError):
+    """Timeouts, dropped connections and 5xx responses."""
+
+    retryable = True
+
+
+class CircuitOpenError(TTSError):
+    """The engine's circuit breaker is open; the request was not sent."""
+
+
+def classify_error(e, message=None, engine=None):
+    """
+    Map an exception raised by an engine SDK to a TTSError subclass.
+    """
+    if isinstance(e, TTSError):
+        return e
+    message = message or str(e)
+    try:
+        from google.api_core import exceptions as api_exceptions
+        from google.auth import exceptions as auth_exceptions
+    except ImportError:
+        api_exceptions = auth_exceptions = None
+
+    if api_exceptions is not None:
+        if isinstance(e, api_exceptions.TooManyRequests):
+            return QuotaError(message, engine)
+        if isinstance(e, (api_exceptions.ServerError, api_exceptions.DeadlineExceeded)):
+            return TransientError(message, engine)
+        if isinstance(e, (api_exceptions.Unauthenticated, api_exceptions.PermissionDenied,
+                          auth_exceptions.DefaultCredentialsError)):
+            return AuthError(message, engine)
+        if isinstance(e, api_exceptions.ClientError):
+            return InvalidRequestError(message, engine)
+    if isinstance(e, (ConnectionError, TimeoutError)):
+        return TransientError(message, engine)
+
+    text = str(e)
+    if "RESOURCE_EXHAUSTED" in text or "429" in text:
+        return QuotaError(message, engine)
+    if "UNAVAILABLE" in text or "DEADLINE_EXCEEDED" in text or "503" in text:
+        return TransientError(message, engine)
+    if "API_KEY_INVALID" in text or "PERMISSION_DENIED" in text:
+        return AuthError(message, engine)
+    return TTSError(message, engine)
+
+
+def is_retryable(error):
+    return getattr(error, "retryable", False)
+
+
+# --- Retries ---
+def backoff_delay(attempt, base_delay=0.5, max_delay=8.0):
+    """
+    Full-jitter exponential backoff: a random delay up to base * 2^attempt.
+    """
+    return random.uniform(0, min(max_delay, base_delay * 2 ** attempt))
+
+
+def call_with_retries(call, max_attempts=3, base_delay=0.5, max_delay=8.0):
+    """
+    Call `call()` (returning `(audio, error)`) until it succeeds, fails with a
+    non-retryable error, or `max_attempts` is reached.
+    """
+    for attempt in range(max_attempts):
+        audio, error = call()
+        if not error or not is_retryable(error) or attempt == max_attempts - 1:
+            return audio, error
+        time.sleep(backoff_delay(attempt, base_delay, max_delay))
+
+
+# --- Circuit Breaker ---
+class CircuitBreaker:
+    """
+    Opens after `failure_threshold` consecutive retryable failures, rejects
+    calls for `reset_timeout` seconds, then lets one trial call through
+    (half-open). A success closes it again; a failure re-opens it.
+    """
+
+    def __init__(self, failure_threshold=5, reset_timeout=30.0):
+        self.failure_threshold = failure_threshold
+        self.reset_timeout = reset_timeout
+        self._failures = 0
+        self._opened_at = None
+        self._trial_in_flight = False
+        self._lock = threading.Lock()
+
+    @property
+    def state(self):
+        with self._lock:
+            if self._opened_at is None:
+                return "closed"
+            if time.monotonic() - self._opened_at >= self.reset_timeout:
+                return "half-open"
+            return "open"
+
+    def allow(self):
+        with self._lock:
+            if self._opened_at is None:
+                return True
+            if time.monotonic() - self._opened_at < self.reset_timeout or self._trial_in_flight:
+                return False
+            self._trial_in_flight = True
+            return True
+
+    def record(self, error):
+        """
+        Record the outcome of an allowed call. Only retryable errors (upstream
+        trouble) count as failures; a bad request still proves the engine is up.
+        """
+        with self._lock:
+            self._trial_in_flight = False
+            if error and is_retryable(error):
+                self._failures += 1
+                if self._opened_at is not None or self._failures >= self.failure_threshold:
+                    self._opened_at = time.monotonic()
+            else:
+                self._failures = 0
+                self._opened_at = None
+
+
+_breakers = {}
+_breakers_lock = threading.Lock()
+
+
+def get_circuit_breaker(engine):
+    """
+    Process-wide circuit breaker for `engine`.
+    """
+    with _breakers_lock:
+        breaker = _breakers.get(engine)
+        if breaker is None:
+            breaker = _breakers[engine] = CircuitBreaker()
+        return breaker
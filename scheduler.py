@@ -0,0 +1,239 @@
+"""
+Fair scheduling of synthesis work across sessions and users.
+
+Work is ordered by priority class first (short interactive requests ahead
+of bulk work, pre-warming last) and then by weighted fair queuing between
+flows, one flow per session: each request gets a virtual finish time of
+`max(virtual clock, flow's previous finish) + cost / weight`, so a session
+that queues a whole book gets its share of turns but cannot hold everyone
+else back. Each engine has a fixed number of call slots granted in that
+order, in front of its rate limiter. Per-user character budgets cap how
+much any one user can send upstream per hour.
+"""
+import heapq
+import itertools
+import math
+import os
+import threading
+import time
+from contextlib import contextmanager
+
+from metrics import REGISTRY
+from rate_limit import TokenBucket, quota_sharers
+
+# Priority classes; lower is served first.
+INTERACTIVE = 0
+BATCH = 1
+BACKGROUND = 2
+
+
+# --- Fair Queue ---
+class FairQueue:
+    """
+    Priority classes, weighted fair queuing within a class. Not thread-safe:
+    callers hold their own lock. Costs are characters.
+    """
+
+    def __init__(self):
+        self._heap = []
+        self._finish = {}  # flow -> virtual finish time of its last request
+        self._clock = 0.0
+        self._seq = itertools.count()
+
+    def __len__(self):
+        return len(self._heap)
+
+    def put(self, item, flow=None, cost=1, priority=BATCH, weight=1.0):
+        seq = next(self._seq)
+        # Work without a flow is its own flow.
+        flow = ("anonymous", seq) if flow is None else flow
+        start = max(self._clock, self._finish.get(flow, 0.0))
+        finish = start + max(cost, 1) / weight
+        self._finish[flow] = finish
+        heapq.heappush(self._heap, (priority, finish, seq, start, flow, cost, item))
+
+    def peek(self):
+        return self._heap[0][-1] if self._heap else None
+
+    def pop(self):
+        _, _, _, start, _, _, item = heapq.heappop(self._heap)
+        self._clock = max(self._clock, start)
+        if len(self._finish) > 2 * len(self._heap) + 64:
+            # Flows that finished before the clock start afresh anyway.
+            self._finish = {flow: t for flow, t in self._finish.items() if t > self._clock}
+        return item
+
+    def ahead(self, match):
+        """
+        `(count, cost)` of the entries served before the first one for
+        which `match(flow, item)` is true (all of them if none is).
+        """
+        count = cost = 0
+        for entry in sorted(self._heap):
+            if match(entry[4], entry[6]):
+                break
+            count += 1
+            cost += entry[5]
+        return count, cost
+
+
+class ServiceRate:
+    """
+    Moving average of seconds per character served, for wait estimates.
+    """
+
+    def __init__(self, seconds_per_char=0.01, alpha=0.2):
+        self.seconds_per_char = seconds_per_char
+        self.alpha = alpha
+        self._lock = threading.Lock()
+
+    def record(self, chars, seconds):
+        with self._lock:
+            self.seconds_per_char += self.alpha * (seconds / max(chars, 1) - self.seconds_per_char)
+
+    def estimate(self, chars, parallel=1):
+        return chars * self.seconds_per_char / max(parallel, 1)
+
+
+# --- Engine Slots ---
+class SlotScheduler:
+    """
+    Grants up to `slots` concurrent calls to one engine, in fair-queue
+    order. Callers block in `acquire` until a slot is handed to them; the
+    rate limiter wait happens while holding the slot.
+    """
+
+    def __init__(self, slots=8, name="engine"):
+        self.slots = slots
+        self.name = name
+        self.service = ServiceRate()
+        self._busy = 0
+        self._queue = FairQueue()
+        self._lock = threading.Lock()
+
+    def _dispatch(self):
+        # Caller holds the lock. Hand free slots to the head of the queue.
+        while self._busy < self.slots and len(self._queue):
+            self._busy += 1
+            self._queue.pop().set()
+
+    def acquire(self, flow=None, cost=1, priority=BATCH, weight=1.0):
+        queued = time.monotonic()
+        granted = threading.Event()
+        with self._lock:
+            self._queue.put(granted, flow, cost, priority, weight)
+            self._dispatch()
+        granted.wait()
+        started = time.monotonic()
+        REGISTRY.observe_queue_wait(self.name, started - queued)
+        return started, cost
+
+    def release(self, ticket):
+        started, cost = ticket
+        self.service.record(cost, time.monotonic() - started)
+        with self._lock:
+            self._busy -= 1
+            self._dispatch()
+
+    @contextmanager
+    def slot(self, flow=None, cost=1, priority=BATCH, weight=1.0):
+        ticket = self.acquire(flow, cost, priority, weight)
+        try:
+            yield
+        finally:
+            self.release(ticket)
+
+    def depth(self):
+        with self._lock:
+            return len(self._queue)
+
+    def estimate(self, flow):
+        """
+        `(ahead, seconds)`: calls waiting ahead of `flow`'s next call and the
+        expected wait for it.
+        """
+        with self._lock:
+            count, cost = self._queue.ahead(lambda f, _: f == flow)
+        return count, self.service.estimate(cost, self.slots)
+
+
+_schedulers = {}
+_schedulers_lock = threading.Lock()
+
+
+def get_scheduler(engine):
+    """
+    Process-wide slot scheduler for `engine`, sized by e.g. GEMINI_TTS_SLOTS
+    and split evenly between worker processes.
+    """
+    with _schedulers_lock:
+        scheduler = _schedulers.get(engine)
+        if scheduler is None:
+            env_name = engine.upper().replace(" ", "_") + "_SLOTS"
+            slots = int(os.environ.get(env_name, "8")) // quota_sharers()
+            scheduler = SlotScheduler(max(1, slots), engine)
+            _schedulers[engine] = scheduler
+        return scheduler
+
+
+# --- User Budgets ---
+class CharacterBudgets:
+    """
+    Per-user character allowance, refilled at `chars_per_hour` and holding
+    at most one hour's worth. A budget of 0 disables the limit.
+    """
+
+    def __init__(self, chars_per_hour=0):
+        self.chars_per_hour = chars_per_hour
+        self._buckets = {}
+        self._kept = 0
+        self._lock = threading.Lock()
+
+    def _bucket(self, user):
+        with self._lock:
+            bucket = self._buckets.get(user)
+            if bucket is None:
+                if len(self._buckets) > 2 * self._kept + 64:
+                    # A full bucket is the same as a new one; forget those users.
+                    self._buckets = {
+                        key: b for key, b in self._buckets.items() if b.available() < b.capacity
+                    }
+                    self._kept = len(self._buckets)
+                bucket = TokenBucket(self.chars_per_hour / 60.0, burst_seconds=3600)
+                self._buckets[user] = bucket
+            return bucket
+
+    def charge(self, user, chars):
+        """
+        Deduct `chars` from `user`'s budget. Returns 0 when charged, else the
+        seconds until the budget covers it (inf if it never will).
+        """
+        if not self.chars_per_hour or chars <= 0:
+            return 0.0
+        if chars > self.chars_per_hour:
+            return math.inf
+        return self._bucket(user).try_take(chars)
+
+    def refund(self, user, chars):
+        """
+        Give back characters charged for work that failed.
+        """
+        if self.chars_per_hour and chars > 0:
+            self._bucket(user).give_back(chars)
+
+    def remaining(self, user):
+        if not self.chars_per_hour:
+            return None
+        return int(self._bucket(user).available())
+
+
+def parse_weights(value):
+    """
+    Per-user fair-share weights from "alice@example.com=2,bob=0.5".
+    """
+    weights = {}
+    for item in (value or "").split(","):
+        user, _, weight = item.strip().rpartition("=")
+        if user:
+            weights[user] = float(weight)
+    return weights
@@ -0,0 +1,10 @@
+import os
+import sys
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+# Tests exercise our code paths, not the project quota.
+for name in ("GEMINI_TTS_RPM", "GOOGLE_CLOUD_TTS_RPM"):
+    os.environ.setdefault(name, "1000000")
+for name in ("GEMINI_TTS_CPM", "GOOGLE_CLOUD_TTS_CPM"):
+    os.environ.setdefault(name, "1000000000")
@@ -0,0 +1,36 @@
+import asyncio
+import time
+
+import pytest
+
+from async_engines import get_async_engine
+from mock_engine import MockTTSBackend
+from scheduler import get_scheduler
+from tts_engines import use_mock_backend
+
+
+@pytest.fixture
+def mock_backend():
+    backend = MockTTSBackend(latency=0.02, jitter=0.0)
+    use_mock_backend(backend)
+    yield backend
+    use_mock_backend(None)
+
+
+def test_cancelled_async_call_gives_its_slot_back(mock_backend):
+    engine = get_async_engine("Gemini TTS")
+    scheduler = get_scheduler("Gemini TTS")
+
+    async def run():
+        call = asyncio.ensure_future(engine.synthesize("Cancelled while upstream.", "en-US", "default"))
+        await asyncio.sleep(0.005)
+        call.cancel()
+        with pytest.raises(asyncio.CancelledError):
+            await call
+
+    asyncio.run(run())
+    # The call finishes on its executor thread and releases the slot there.
+    deadline = time.monotonic() + 5
+    while scheduler._busy and time.monotonic() < deadline:
+        time.sleep(0.01)
+    assert scheduler._busy == 0
@@ -0,0 +1,37 @@
+import os
+
+from audio_cache import AudioCache
+
+
+def test_disk_tier_evicts_least_recently_used_without_listing(tmp_path, monkeypatch):
+    cache = AudioCache(cache_dir=str(tmp_path), max_memory_bytes=0, max_disk_bytes=250)
+
+    def listdir(path):
+        raise AssertionError("the directory is only listed at startup")
+
+    monkeypatch.setattr(os, "listdir", listdir)
+    cache.put("a", b"a" * 100)
+    cache.put("b", b"b" * 100)
+    assert cache.get("a") == b"a" * 100  # now more recent than "b"
+    cache.put("c", b"c" * 100)
+
+    assert (tmp_path / "a.bin").exists()
+    assert not (tmp_path / "b.bin").exists()
+    assert (tmp_path / "c.bin").exists()
+    assert cache._disk.total_bytes() == 200
+
+
+def test_disk_index_is_seeded_from_existing_files(tmp_path):
+    for i, name in enumerate(["old", "new"]):
+        path = tmp_path / f"{name}.bin"
+        path.write_bytes(b"x" * 100)
+        os.utime(path, (1000 + i, 1000 + i))
+    (tmp_path / "stray.tmp").write_bytes(b"x" * 1000)
+
+    cache = AudioCache(cache_dir=str(tmp_path), max_memory_bytes=0, max_disk_bytes=250)
+    assert cache._disk.total_bytes() == 200
+    cache.put("fresh", b"f" * 100)
+
+    assert not (tmp_path / "old.bin").exists()
+    assert (tmp_path / "new.bin").exists()
+    assert cache.get("fresh") == b"f" * 100
@@ -0,0 +1,66 @@
+import asyncio
+import json
+import os
+
+import pytest
+
+import batch_narrate
+import resilience
+from mock_engine import MockTTSBackend
+from tts_engines import use_mock_backend
+
+
+@pytest.fixture
+def mock_backend():
+    backend = MockTTSBackend(latency=0.02, jitter=0.0)
+    use_mock_backend(backend)
+    yield backend
+    use_mock_backend(None)
+
+
+@pytest.fixture
+def failing_backend(monkeypatch):
+    # Fresh circuit breakers, so the ones this test trips don't leak out.
+    monkeypatch.setattr(resilience, "_breakers", {})
+    backend = MockTTSBackend(latency=0.0, jitter=0.0, error_rate=1.0)
+    use_mock_backend(backend)
+    yield backend
+    use_mock_backend(None)
+
+
+def test_rows_that_fail_upstream_are_recorded_as_failed(tmp_path, failing_backend):
+    items = [
+        {"id": str(i), "text": f"Row {i} never gets audio.", "engine": "Gemini TTS", "language": "en-US", "voice": "default"}
+        for i in range(3)
+    ]
+    summary = batch_narrate.run_batch(items, str(tmp_path), workers=3)
+
+    assert summary["failed"] == 3 and summary["done"] == 0
+    with open(tmp_path / batch_narrate.MANIFEST_NAME, encoding="utf-8") as f:
+        entries = [json.loads(line) for line in f]
+    assert sorted(e["id"] for e in entries) == ["0", "1", "2"]
+    assert all(e["status"] == "failed" and isinstance(e["error"], str) for e in entries)
+
+
+def test_batch_with_more_rows_than_executor_threads_finishes(tmp_path, mock_backend):
+    # Slot waiters used to fill the default executor, leaving no thread for
+    # the slot holders' upstream calls.
+    threads = min(32, (os.cpu_count() or 1) + 4)
+    rows = threads * 3
+    items = [
+        {"id": str(i), "text": f"Row {i}. " + "Some words here. " * 20,
+         "engine": "Gemini TTS", "language": "en-US", "voice": "default"}
+        for i in range(rows)
+    ]
+    manifest = batch_narrate.Manifest(str(tmp_path / batch_narrate.MANIFEST_NAME))
+
+    async def run():
+        return await asyncio.wait_for(
+            batch_narrate._run_batch(items, str(tmp_path), rows, None, manifest), timeout=30
+        )
+
+    try:
+        counts = asyncio.run(run())
+    finally:
+        manifest.close()
+    assert counts == {"done": rows, "failed": 0}
@@ -0,0 +1,25 @@
+import generation
+from generation import join_segments
+
+
+def test_mp3_segments_join_by_concatenation():
+    assert join_segments([b"ab", b"cd"]) == (b"abcd", None)
+
+
+def test_opus_segments_are_not_byte_concatenated(monkeypatch):
+    monkeypatch.setattr(generation, "postprocessing_available", lambda: False)
+    audio, error = join_segments([b"OggS1", b"OggS2"], segment_format="Opus (OGG)", output_format="Opus (OGG)")
+    assert audio is None
+    assert "ffmpeg" in error
+
+    assert join_segments([b"OggS1"], segment_format="Opus (OGG)", output_format="Opus (OGG)") == (b"OggS1", None)
+
+
+def test_opus_segments_are_remuxed(monkeypatch):
+    calls = []
+    monkeypatch.setattr(generation, "postprocessing_available", lambda: True)
+    monkeypatch.setattr(generation, "concat_streams", lambda segments, ext, container: calls.append(
+        (segments, ext, container)) or b"joined")
+    audio, error = join_segments([b"OggS1", b"OggS2"], segment_format="Opus (OGG)", output_format="Opus (OGG)")
+    assert (audio, error) == (b"joined", None)
+    assert calls == [([b"OggS1", b"OggS2"], "ogg", "ogg")]
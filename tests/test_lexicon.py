@@ -0,0 +1,28 @@
+import json
+import os
+
+import pytest
+
+from lexicon import LexiconFile
+
+
+def _write(path, data, mtime):
+    path.write_text(data if isinstance(data, str) else json.dumps(data), encoding="utf-8")
+    os.utime(path, (mtime, mtime))
+
+
+@pytest.mark.parametrize("bad", [
+    ["SQL", "sequel"],
+    {"en": ["SQL", "sequel"]},
+    {"en": {"SQL": 1}},
+    '{"en": {"SQL": ',
+])
+def test_bad_reload_keeps_the_previous_lexicon(tmp_path, bad):
+    path = tmp_path / "lexicon.json"
+    _write(path, {"en": {"SQL": "sequel"}}, 1000)
+    lexicon_file = LexiconFile(str(path))
+    assert lexicon_file.for_language("en-US").apply("SQL rocks") == "sequel rocks"
+
+    _write(path, bad, 2000)
+    assert lexicon_file.for_language("en-US").apply("SQL rocks") == "sequel rocks"
+    assert lexicon_file.for_language("en-GB").apply("SQL rocks") == "sequel rocks"
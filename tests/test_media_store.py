@@ -0,0 +1,16 @@
+import os
+
+from media_store import MediaStore
+
+
+def test_store_stays_under_budget_and_keeps_rewritten_clips(tmp_path):
+    store = MediaStore(root=str(tmp_path), max_bytes=250)
+    first = store.put(b"1" * 100)
+    second = store.put(b"2" * 100)
+    assert store.put(b"1" * 100) == first  # stored again, so kept over `second`
+    third = store.put(b"3" * 100)
+
+    assert store.exists(first)
+    assert not store.exists(second)
+    assert store.exists(third)
+    assert sum(os.path.getsize(tmp_path / name) for name in os.listdir(tmp_path)) == 200
@@ -0,0 +1,60 @@
+import json
+
+import resilience
+from audio_cache import make_cache_key
+from mock_engine import MockTTSBackend
+from prewarm import PreWarmer, plan_prewarm
+from tts_engines import model_for, use_mock_backend
+
+
+class RecordingCache:
+    def __init__(self):
+        self.entries = {}
+
+    def contains(self, key):
+        return key in self.entries
+
+    def put(self, key, audio, memory=True):
+        self.entries[key] = audio
+
+
+def test_malformed_log_lines_are_skipped(tmp_path):
+    good = {"engine": "Gemini TTS", "language": "en-US", "voice": "default", "format": "MP3", "text": "Welcome back."}
+    log = tmp_path / "phrases.jsonl"
+    log.write_text("\n".join([
+        json.dumps(good),
+        "not json",
+        json.dumps([1, 2]),
+        json.dumps({"language": "en-US", "voice": "default", "text": "No engine."}),
+        json.dumps(dict(good, text=None)),
+        json.dumps(good),
+    ]) + "\n", encoding="utf-8")
+    assert plan_prewarm(log_path=str(log)) == [("Gemini TTS", "en-US", "default", "MP3", "Welcome back.")]
+
+
+def test_hot_phrase_voices_without_an_engine_are_skipped(tmp_path):
+    phrases = tmp_path / "hot.json"
+    phrases.write_text(json.dumps({
+        "phrases": {"en-US": ["Thanks for listening."]},
+        "voices": [{"language": "en-US"}, {"engine": "Gemini TTS", "language": "en-US"}],
+    }), encoding="utf-8")
+    assert plan_prewarm(phrases_path=str(phrases)) == [
+        ("Gemini TTS", "en-US", "default", "MP3", "Thanks for listening."),
+    ]
+
+
+def test_phrases_are_cached_under_the_format_the_engine_returns(monkeypatch):
+    monkeypatch.setattr(resilience, "_breakers", {})
+    use_mock_backend(MockTTSBackend(latency=0, jitter=0, error_rate=0))
+    try:
+        cache = RecordingCache()
+        stats = PreWarmer(cache, pause=0).run([
+            ("Gemini TTS", "en-US", "default", "Opus (OGG)", "Welcome back."),
+            ("Gemini TTS", "en-US", "default", "MP3", "Welcome back."),
+        ])
+    finally:
+        use_mock_backend(None)
+    assert stats == {"warmed": 1, "cached": 1, "failed": 0}
+    assert list(cache.entries) == [
+        make_cache_key("Gemini TTS", model_for("Gemini TTS"), "en-US", "default", 1.0, 0.0, "Welcome back.", "MP3"),
+    ]
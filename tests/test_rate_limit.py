@@ -0,0 +1,58 @@
+import pytest
+
+import rate_limit
+from rate_limit import EngineRateLimiter, get_rate_limiter
+from scheduler import get_scheduler
+
+
+class FakeClock:
+    def __init__(self):
+        self.now = 0.0
+
+    def monotonic(self):
+        return self.now
+
+    def sleep(self, seconds):
+        self.now += seconds
+
+
+@pytest.mark.parametrize("rpm", [6, 60, 600])
+def test_no_minute_admits_more_than_the_quota(monkeypatch, rpm):
+    clock = FakeClock()
+    monkeypatch.setattr(rate_limit, "time", clock)
+    limiter = EngineRateLimiter(rpm=rpm, cpm=10 ** 9)
+
+    admitted = []
+    while clock.now < 300:
+        limiter.acquire(1)
+        admitted.append(clock.now)
+
+    for i, start in enumerate(admitted):
+        in_window = sum(1 for t in admitted[i:] if t < start + 60)
+        assert in_window <= rpm
+
+
+def test_character_quota_holds_over_a_minute(monkeypatch):
+    clock = FakeClock()
+    monkeypatch.setattr(rate_limit, "time", clock)
+    limiter = EngineRateLimiter(rpm=10 ** 6, cpm=60000)
+
+    chars = 0
+    while True:
+        limiter.acquire(1000)
+        if clock.now >= 60:
+            break
+        chars += 1000
+    assert chars <= 60000
+
+
+def test_worker_processes_split_slots_and_rate_limits(monkeypatch):
+    monkeypatch.setenv("TTS_WORKER_TOTAL", "4")
+    monkeypatch.setenv("SHARED_ENGINE_SLOTS", "8")
+    monkeypatch.setenv("SHARED_ENGINE_RPM", "100")
+    monkeypatch.setenv("SHARED_ENGINE_CPM", "40000")
+    assert get_scheduler("Shared Engine").slots == 2
+    limiter = get_rate_limiter("Shared Engine")
+    share = EngineRateLimiter(rpm=25, cpm=10000)
+    assert limiter.requests.rate == pytest.approx(share.requests.rate)
+    assert limiter.characters.rate == pytest.approx(share.characters.rate)
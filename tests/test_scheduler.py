@@ -0,0 +1,60 @@
+import concurrent.futures
+import threading
+
+import rate_limit
+from scheduler import BATCH, INTERACTIVE, CharacterBudgets, SlotScheduler
+
+
+class FakeClock:
+    def __init__(self):
+        self.now = 0.0
+
+    def monotonic(self):
+        return self.now
+
+
+def test_interactive_requests_go_ahead_of_batch():
+    scheduler = SlotScheduler(slots=1)
+    held = scheduler.acquire()
+    order = []
+
+    def call(name, priority):
+        with scheduler.slot(name, 100, priority):
+            order.append(name)
+
+    with concurrent.futures.ThreadPoolExecutor(4) as pool:
+        batch = [pool.submit(call, "batch", BATCH) for _ in range(2)]
+        while scheduler.depth() < 2:
+            threading.Event().wait(0.01)
+        interactive = pool.submit(call, "interactive", INTERACTIVE)
+        while scheduler.depth() < 3:
+            threading.Event().wait(0.01)
+        scheduler.release(held)
+        for future in batch + [interactive]:
+            future.result(timeout=5)
+    assert order[0] == "interactive"
+
+
+def test_refunded_characters_can_be_charged_again():
+    budgets = CharacterBudgets(chars_per_hour=1000)
+    assert budgets.charge("ip:10.0.0.1", 800) == 0
+    assert budgets.charge("ip:10.0.0.1", 800) > 0
+    budgets.refund("ip:10.0.0.1", 800)
+    assert budgets.charge("ip:10.0.0.1", 800) == 0
+
+
+def test_budgets_forget_users_whose_allowance_refilled(monkeypatch):
+    clock = FakeClock()
+    monkeypatch.setattr(rate_limit, "time", clock)
+    budgets = CharacterBudgets(chars_per_hour=1000)
+    for i in range(1000):
+        budgets.charge(f"ip:10.0.{i // 256}.{i % 256}", 100)
+    assert len(budgets._buckets) == 1000
+
+    clock.now += 3600
+    for i in range(1100):
+        budgets.charge(f"ip:10.2.{i // 256}.{i % 256}", 100)
+    assert "ip:10.0.0.0" not in budgets._buckets
+    assert len(budgets._buckets) < 2100
+    # A forgotten user starts again from a full allowance.
+    assert budgets.remaining("ip:10.0.0.0") == 1000
@@ -0,0 +1,60 @@
+import pytest
+
+from bench_tts import sample_text
+from text_normalization import prepare_for_speech, segment_text
+from tts_pipeline import split_text
+
+
+@pytest.mark.parametrize("text, spoken", [
+    ("$5.50", "five dollars fifty cents"),
+    ("$0.99", "ninety-nine cents"),
+    ("$1,200", "one thousand two hundred dollars"),
+    ("$2.5", "two point five dollars"),
+    ("10:30", "ten thirty"),
+    ("9:05", "nine oh five"),
+    ("12:00", "twelve o'clock"),
+    ("Jan. 1st.", "January first."),
+    ("in 1990", "in nineteen ninety"),
+    ("Since 2005", "Since two thousand five"),
+    ("May 5, 2020", "May five, twenty twenty"),
+    ("Jan. 1st, 1999", "January first, nineteen ninety-nine"),
+    ("the 1990s", "the nineteen nineties"),
+    ("version 2.0.1", "version 2.0.1"),
+    ("2.5 km", "two point five km"),
+])
+def test_english_normalization(text, spoken):
+    assert prepare_for_speech(text, "en-US") == spoken
+
+
+@pytest.mark.parametrize("text", ["1234 items", "call 555-1234", "room 1984"])
+def test_numbers_without_a_date_context_are_not_years(text):
+    assert "twelve thirty-four" not in prepare_for_speech(text, "en-US")
+    assert "nineteen eighty-four" not in prepare_for_speech(text, "en-US")
+
+
+def test_hindi_currency_and_clock():
+    assert prepare_for_speech("₹5.50", "hi-IN") == "पाँच रुपये पचास पैसे"
+    assert prepare_for_speech("10:30", "hi-IN") == "दस बजकर तीस मिनट"
+
+
+def test_abbreviations_do_not_end_sentences():
+    text = "The parade is on Jan. 1st. at noon. We meet at St. Mary's with J. K. Rowling. Then we leave."
+    chunks = segment_text(text, "en-US", max_chars=70)
+    assert chunks == [
+        "The parade is on January first. at noon.",
+        "We meet at St. Mary's with J. K. Rowling. Then we leave.",
+    ]
+
+
+def test_chunks_are_balanced():
+    for take in range(10):
+        chunks = split_text(sample_text(2000, take), max_chars=1000)
+        assert all(len(chunk) >= 250 for chunk in chunks), [len(chunk) for chunk in chunks]
+
+
+def test_editing_a_sentence_keeps_the_other_chunks():
+    sentences = sample_text(10000).split(". ")
+    before = split_text(". ".join(sentences))
+    sentences[40] += " with a few more words"
+    after = split_text(". ".join(sentences))
+    assert len(set(after) - set(before)) <= 2
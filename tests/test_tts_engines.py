@@ -0,0 +1,30 @@
+import time
+
+import pytest
+
+import resilience
+import tts_engines
+from mock_engine import MockTTSBackend
+from tts_engines import synthesize, use_mock_backend
+
+
+class SlowLimiter:
+    def acquire(self, chars):
+        time.sleep(0.2)
+
+
+@pytest.fixture
+def mock_backend(monkeypatch):
+    monkeypatch.setattr(resilience, "_breakers", {})
+    use_mock_backend(MockTTSBackend(latency=0, jitter=0, error_rate=0))
+    yield
+    use_mock_backend(None)
+
+
+def test_recorded_latency_excludes_rate_limit_wait(monkeypatch, mock_backend):
+    recorded = []
+    monkeypatch.setattr(tts_engines, "get_rate_limiter", lambda engine: SlowLimiter())
+    monkeypatch.setattr(tts_engines, "record_synthesis", lambda *args, **kwargs: recorded.append(args[3]))
+    audio, error = synthesize("Google Cloud TTS", "en-US", "latency probe", "en-US-Standard-A", failover=False)
+    assert error is None and audio
+    assert recorded and recorded[0] < 0.1
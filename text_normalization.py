@@ -0,0 +1,303 @@
+"""
+Language-aware text preparation for English, Hindi and Telugu.
+
+Text is rewritten with the pronunciation lexicon (see `lexicon`),
+normalized for speech (abbreviations, numbers, clock times, currency and
+percent signs spelled out, native digits folded to ASCII) and then
+segmented on the language's own sentence terminators, including the danda
+(।), skipping full stops that only end an abbreviation. Every segment
+is kept under the engine's per-request UTF-8 byte limit, which multi-byte
+Devanagari and Telugu text reaches far sooner than English. All patterns are
+compiled once at import, and prepared paragraphs are memoized so
+regenerating an edited script only rewrites the paragraphs that changed.
+"""
+import re
+from functools import lru_cache
+
+from lexicon import lexicon_for
+from tts_engines import MAX_REQUEST_BYTES
+from tts_pipeline import split_text
+
+# --- English Numbers ---
+_EN_ONES = [
+    "zero", "one", "two", "three", "four", "five", "six", "seven", "eight", "nine", "ten",
+    "eleven", "twelve", "thirteen", "fourteen", "fifteen", "sixteen", "seventeen", "eighteen", "nineteen",
+]
+_EN_TENS = ["", "", "twenty", "thirty", "forty", "fifty", "sixty", "seventy", "eighty", "ninety"]
+_EN_SCALES = [(10 ** 12, "trillion"), (10 ** 9, "billion"), (10 ** 6, "million"), (1000, "thousand"), (100, "hundred")]
+_EN_ORDINALS = {
+    "one": "first", "two": "second", "three": "third", "five": "fifth",
+    "eight": "eighth", "nine": "ninth", "twelve": "twelfth",
+}
+
+
+def english_number(n):
+    if n < 20:
+        return _EN_ONES[n]
+    if n < 100:
+        tens, ones = divmod(n, 10)
+        return _EN_TENS[tens] + (f"-{_EN_ONES[ones]}" if ones else "")
+    for value, word in _EN_SCALES:
+        if n >= value:
+            count, rest = divmod(n, value)
+            words = f"{english_number(count)} {word}"
+            return f"{words} {english_number(rest)}" if rest else words
+
+
+def english_year(n):
+    # 1999 -> nineteen ninety-nine, 1900 -> nineteen hundred, 2005 -> two thousand five.
+    century, rest = divmod(n, 100)
+    if 2000 <= n < 2010:
+        return english_number(n)
+    if rest == 0:
+        return f"{english_number(century)} hundred"
+    if rest < 10:
+        return f"{english_number(century)} oh {english_number(rest)}"
+    return f"{english_number(century)} {english_number(rest)}"
+
+
+def english_decade(n):
+    # 1990 -> nineteen nineties, 1900 -> nineteen hundreds.
+    year = english_year(n)
+    return year[:-1] + "ies" if year.endswith("y") else year + "s"
+
+
+def english_ordinal(n):
+    words = english_number(n)
+    head, _, last = words.rpartition(" ")
+    last_head, dash, last_word = last.rpartition("-")
+    if last_word in _EN_ORDINALS:
+        last_word = _EN_ORDINALS[last_word]
+    elif last_word.endswith("y"):
+        last_word = last_word[:-1] + "ieth"
+    else:
+        last_word += "th"
+    last = f"{last_head}{dash}{last_word}"
+    return f"{head} {last}" if head else last
+
+
+# --- Hindi Numbers ---
+_HI_BELOW_100 = (
+    "शून्य एक दो तीन चार पाँच छह सात आठ नौ दस ग्यारह बारह तेरह चौदह पंद्रह सोलह सत्रह अठारह उन्नीस "
+    "बीस इक्कीस बाईस तेईस चौबीस पच्चीस छब्बीस सत्ताईस अट्ठाईस उनतीस तीस इकतीस बत्तीस तैंतीस चौंतीस "
+    "पैंतीस छत्तीस सैंतीस अड़तीस उनतालीस चालीस इकतालीस बयालीस तैंतालीस चवालीस पैंतालीस छियालीस "
+    "सैंतालीस अड़तालीस उनचास पचास इक्यावन बावन तिरेपन चौवन पचपन छप्पन सत्तावन अट्ठावन उनसठ साठ "
+    "इकसठ बासठ तिरेसठ चौंसठ पैंसठ छियासठ सड़सठ अड़सठ उनहत्तर सत्तर इकहत्तर बहत्तर तिहत्तर चौहत्तर "
+    "पचहत्तर छिहत्तर सतहत्तर अठहत्तर उन्यासी अस्सी इक्यासी बयासी तिरासी चौरासी पचासी छियासी "
+    "सत्तासी अट्ठासी नवासी नब्बे इक्यानबे बानबे तिरानबे चौरानबे पचानबे छियानबे सत्तानबे अट्ठानबे निन्यानबे"
+).split()
+# Indian numbering: lakh = 10^5, crore = 10^7, arab = 10^9.
+_HI_SCALES = [(10 ** 9, "अरब"), (10 ** 7, "करोड़"), (10 ** 5, "लाख"), (1000, "हज़ार"), (100, "सौ")]
+
+
+def hindi_number(n):
+    if n < 100:
+        return _HI_BELOW_100[n]
+    for value, word in _HI_SCALES:
+        if n >= value:
+            count, rest = divmod(n, value)
+            words = f"{hindi_number(count)} {word}"
+            return f"{words} {hindi_number(rest)}" if rest else words
+
+
+# --- Clock Times ---
+def english_clock(hours, minutes):
+    # 10:00 -> ten o'clock, 10:05 -> ten oh five, 10:30 -> ten thirty.
+    if minutes == 0:
+        return f"{english_number(hours)} o'clock"
+    if minutes < 10:
+        return f"{english_number(hours)} oh {english_number(minutes)}"
+    return f"{english_number(hours)} {english_number(minutes)}"
+
+
+def hindi_clock(hours, minutes):
+    # 10:00 -> दस बजे, 10:30 -> दस बजकर तीस मिनट.
+    if minutes == 0:
+        return f"{hindi_number(hours)} बजे"
+    return f"{hindi_number(hours)} बजकर {hindi_number(minutes)} मिनट"
+
+
+# --- Language Rules ---
+# Grouped (1,234 or Indian 1,23,456) or plain digits, optional decimals;
+# dotted versions such as 2.0.1 are left to the engine.
+_NUMBER = re.compile(r"(?<![\w.,])(\d{1,3}(?:,\d{2,3})+|\d+)(?:\.(\d+))?(?!\w|\.\d)")
+_CURRENCY_PREFIX = re.compile(r"([$₹€£])\s?(\d[\d,]*)(?:\.(\d+))?")
+_CLOCK = re.compile(r"(?<![\w:.,])([01]?\d|2[0-3]):([0-5]\d)(?![\w:]|[.,]\d)")
+_PERCENT = re.compile(r"(\d[\d,]*(?:\.\d+)?)\s?%")
+_EN_ORDINAL = re.compile(r"\b(\d+)(?:st|nd|rd|th)\b")
+# Four digits are only read as a year after a preposition or month ("in 1990",
+# "May 5, 2020"); "1234 items" or "555-1234" stay numbers.
+_EN_YEAR = re.compile(
+    r"((?i:\b(?:in|since|by|of|from|until|before|after)\s+)"
+    r"|\b(?:January|February|March|April|May|June|July|August|September|October|November|December"
+    r"|Mar\.|Apr\.|Jun\.|Jul\.)(?:\s+\d{1,2}(?:st|nd|rd|th)?,?)?\s+)"
+    r"(1[1-9]\d\d|20\d\d)(?!\w|%|[.,]\d)"
+)
+_EN_DECADE = re.compile(r"(?<![\w.,'])(1[1-9]\d0|20\d0)s\b")
+# Ungrouped digit runs longer than this (phone numbers, IDs) are read digit by digit.
+_MAX_SPOKEN_DIGITS = 7
+
+
+class LanguageRules:
+    """
+    Normalization and sentence-splitting rules for one language.
+
+    `abbreviations` maps regex patterns to their spoken form; `non_terminal`
+    lists (fixed-width) patterns for abbreviations that are left as written
+    and never end a sentence. `currencies` maps currency symbols to the
+    spoken `(unit, subunit)`; `number` spells out an int, or is None to
+    leave numerals to the engine (after folding native digits); `clock`
+    spells out `(hours, minutes)` for times such as 10:30.
+    """
+
+    def __init__(self, sentence_end, abbreviations=(), non_terminal=(), currencies=None, percent="percent",
+                 point="point", number=None, digits="", ordinals=False, years=False, clock=None):
+        guards = "".join(rf"(?<!\b{pattern})" for pattern in non_terminal)
+        self.sentence_end = re.compile(f"{guards}(?:{sentence_end})")
+        self.abbreviations = [(re.compile(pattern), spoken) for pattern, spoken in abbreviations]
+        self.currencies = currencies or {}
+        self.percent = percent
+        self.point = point
+        self.number = number
+        self.digits = str.maketrans(digits, "0123456789") if digits else None
+        self.ordinals = ordinals
+        self.years = years
+        self.clock = clock
+
+    def _spell(self, integer, fraction=None):
+        digits = integer.replace(",", "")
+        if self.number is None:
+            return f"{digits}.{fraction}" if fraction else digits
+        if ("," not in integer and len(digits) > _MAX_SPOKEN_DIGITS) or (len(digits) > 1 and digits.startswith("0")):
+            words = " ".join(self.number(int(d)) for d in digits)
+        else:
+            words = self.number(int(digits))
+        if fraction:
+            words += f" {self.point} " + " ".join(self.number(int(d)) for d in fraction)
+        return words
+
+    def _spell_match(self, text):
+        integer, _, fraction = text.partition(".")
+        return self._spell(integer, fraction or None)
+
+    def _spell_amount(self, symbol, integer, fraction):
+        unit, subunit = self.currencies.get(symbol, (symbol, None))
+        if self.number is None or subunit is None or fraction is None or len(fraction) != 2:
+            return f"{self._spell(integer, fraction)} {unit}"
+        # $5.50 -> five dollars fifty, read as units and subunits.
+        words = [] if int(integer.replace(",", "")) == 0 and int(fraction) else [f"{self._spell(integer)} {unit}"]
+        if int(fraction):
+            words.append(f"{self.number(int(fraction))} {subunit}")
+        return " ".join(words)
+
+    def normalize(self, text):
+        if self.digits:
+            text = text.translate(self.digits)
+        for pattern, spoken in self.abbreviations:
+            text = pattern.sub(spoken, text)
+        text = _CURRENCY_PREFIX.sub(lambda m: self._spell_amount(*m.groups()), text)
+        text = _PERCENT.sub(lambda m: f"{self._spell_match(m.group(1))} {self.percent}", text)
+        if self.number is None:
+            return text
+        if self.clock:
+            text = _CLOCK.sub(lambda m: self.clock(int(m.group(1)), int(m.group(2))), text)
+        if self.years:
+            text = _EN_DECADE.sub(lambda m: english_decade(int(m.group(1))), text)
+            text = _EN_YEAR.sub(lambda m: m.group(1) + english_year(int(m.group(2))), text)
+        if self.ordinals:
+            text = _EN_ORDINAL.sub(lambda m: english_ordinal(int(m.group(1))), text)
+        return _NUMBER.sub(lambda m: self._spell(m.group(1), m.group(2)), text)
+
+
+LANGUAGE_RULES = {
+    "en": LanguageRules(
+        # A lowercase word after the full stop continues the sentence ("Jan. 1st. at noon").
+        sentence_end=r"(?<=[.!?])\s+(?![a-z])",
+        abbreviations=[
+            (r"\bDr\.", "Doctor"), (r"\bMr\.", "Mister"), (r"\bMrs\.", "Missus"), (r"\bMs\.", "Miz"),
+            (r"\bProf\.", "Professor"), (r"\bJr\.", "Junior"), (r"\bSr\.", "Senior"),
+            (r"\bvs\.", "versus"), (r"\be\.g\.", "for example"), (r"\bi\.e\.", "that is"),
+            (r"\bapprox\.", "approximately"), (r"\bNo\.(?=\s*\d)", "number"),
+            (r"\bJan\.", "January"), (r"\bFeb\.", "February"), (r"\bAug\.", "August"),
+            (r"\bSept?\.", "September"), (r"\bOct\.", "October"), (r"\bNov\.", "November"),
+            (r"\bDec\.", "December"),
+            # "etc." can end a sentence; keep the full stop when it does.
+            (r"\betc\.(?=\s+[A-Z]|\s*$)", "et cetera."), (r"\betc\.", "et cetera"),
+        ],
+        # Left as written, but a full stop after them does not end a sentence.
+        non_terminal=[
+            r"St\.", r"Mt\.", r"Ave\.", r"Inc\.", r"Ltd\.", r"Co\.", r"Corp\.", r"Fig\.",
+            r"Mar\.", r"Apr\.", r"Jun\.", r"Jul\.", r"U\.S\.", r"U\.K\.", r"[A-Z]\.",
+        ],
+        currencies={"$": ("dollars", "cents"), "₹": ("rupees", "paise"), "€": ("euros", "cents"), "£": ("pounds", "pence")},
+        number=english_number, ordinals=True, years=True, clock=english_clock,
+    ),
+    "hi": LanguageRules(
+        # The danda often has no space after it.
+        sentence_end=r"(?<=[।॥])\s*|(?<=[.!?])\s+",
+        abbreviations=[
+            (r"डॉ\.", "डॉक्टर"), (r"प्रो\.", "प्रोफ़ेसर"), (r"श्रीमती\.", "श्रीमती"), (r"श्री\.", "श्री"),
+            (r"कु\.", "कुमारी"), (r"रु\.", "रुपये"), (r"नं\.", "नंबर"),
+        ],
+        currencies={"$": ("डॉलर", "सेंट"), "₹": ("रुपये", "पैसे"), "€": ("यूरो", "सेंट"), "£": ("पाउंड", "पेंस")},
+        percent="प्रतिशत", point="दशमलव", number=hindi_number, digits="०१२३४५६७८९", clock=hindi_clock,
+    ),
+    "te": LanguageRules(
+        sentence_end=r"(?<=[.!?।॥])\s+",
+        abbreviations=[
+            (r"డా\.", "డాక్టర్"), (r"శ్రీమతి\.", "శ్రీమతి"), (r"శ్రీ\.", "శ్రీ"), (r"రూ\.", "రూపాయలు"),
+        ],
+        currencies={"$": ("డాలర్లు", None), "₹": ("రూపాయలు", None), "€": ("యూరోలు", None), "£": ("పౌండ్లు", None)},
+        # Cloud TTS reads Telugu numerals well; only native digits are folded.
+        percent="శాతం", number=None, digits="౦౧౨౩౪౫౬౭౮౯",
+    ),
+}
+
+
+def rules_for(language):
+    """
+    Rules for a BCP-47 code such as "hi-IN"; unknown languages get English
+    sentence splitting without normalization.
+    """
+    return LANGUAGE_RULES.get(language.split("-")[0].lower()) or _FALLBACK
+
+
+_FALLBACK = LanguageRules(sentence_end=r"(?<=[.!?।])\s+")
+
+
+# --- Public API ---
+def normalize_for_speech(text, language):
+    rules = rules_for(language)
+    if rules is _FALLBACK:
+        return text
+    return rules.normalize(text)
+
+
+@lru_cache(maxsize=4096)
+def _prepare_paragraph(lexicon, language, paragraph):
+    # Keyed by the compiled lexicon, so editing the lexicon file misses here.
+    return normalize_for_speech(lexicon.apply(paragraph), language)
+
+
+def prepare_for_speech(text, language):
+    """
+    Apply the pronunciation lexicon, then normalize, one paragraph at a time.
+    """
+    lexicon = lexicon_for(language)
+    return "\n".join(_prepare_paragraph(lexicon, language, paragraph) for paragraph in text.split("\n"))
+
+
+def segment_text(text, language, engine=None, max_chars=1000):
+    """
+    Prepare `text` for `language` and split it into chunks of at most
+    `max_chars` characters that also fit `engine`'s request byte limit.
+    Chunks, and so cache keys, are the rewritten text: a lexicon edit only
+    changes the keys of chunks it actually rewrites.
+    """
+    rules = rules_for(language)
+    return split_text(
+        prepare_for_speech(text, language),
+        max_chars=max_chars,
+        max_bytes=MAX_REQUEST_BYTES.get(engine),
+        sentence_end=rules.sentence_end,
+    )
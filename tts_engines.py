@@ -0,0 +1,324 @@
+import time
+
+import streamlit as st
+
+from audio_cache import SingleFlight, cached_synthesis, make_cache_key
+from metrics import record_phrase, record_synthesis
+from mock_engine import backend_from_env
+from rate_limit import get_rate_limiter
+from resilience import (
+    CircuitOpenError, InvalidRequestError, NoAudioError, call_with_retries, classify_error, get_circuit_breaker, is_retryable,
+)
+from scheduler import BATCH, get_scheduler
+
+ENGINES = ["Gemini TTS", "Google Cloud TTS"]
+
+LANGUAGES = {
+    "English": "en-US",
+    "Hindi": "hi-IN",
+    "Telugu": "te-IN",
+}
+
+CLOUD_VOICES = {
+    "en-US": ["en-US-Wavenet-D", "en-US-Wavenet-F", "en-US-Standard-C"],
+    "hi-IN": ["hi-IN-Wavenet-A", "hi-IN-Standard-A"],
+    "te-IN": ["te-IN-Wavenet-A"],
+}
+
+# Per-request input limits in UTF-8 bytes. Cloud TTS rejects anything over
+# 5000; Gemini gets the same cap so chunks are comparable across engines.
+MAX_REQUEST_BYTES = {
+    "Gemini TTS": 5000,
+    "Google Cloud TTS": 5000,
+}
+
+# Output encodings. `native` lists the engines that can return the format
+# directly; for the others the audio is synthesized as MP3 and transcoded.
+# Formats with a `container` are whole streams per request and can only be
+# joined by remuxing with ffmpeg.
+OUTPUT_FORMATS = {
+    "MP3": {
+        "mime": "audio/mpeg", "ext": "mp3", "cloud_encoding": "MP3",
+        "ffmpeg_args": ["-f", "mp3"], "native": ["Gemini TTS", "Google Cloud TTS"],
+    },
+    "Opus (OGG)": {
+        "mime": "audio/ogg", "ext": "ogg", "cloud_encoding": "OGG_OPUS",
+        "ffmpeg_args": ["-c:a", "libopus", "-f", "ogg"], "native": ["Google Cloud TTS"], "container": "ogg",
+    },
+    "WAV": {
+        "mime": "audio/wav", "ext": "wav", "cloud_encoding": "LINEAR16",
+        "ffmpeg_args": ["-c:a", "pcm_s16le", "-f", "wav"], "native": ["Google Cloud TTS"],
+    },
+}
+
+# When an engine is down (breaker open or retries exhausted), requests are
+# sent to its fallback instead.
+FAILOVER = {"Gemini TTS": "Google Cloud TTS"}
+
+# We use a powerful text model and instruct it to output audio.
+# gemini-1.5-pro is a great choice. gemini-1.5-flash should also work.
+GEMINI_MODEL = "gemini-1.5-pro"
+
+# Local stand-in for both APIs (see mock_engine.py), enabled with TTS_MOCK_BACKEND=1
+# or `use_mock_backend()`.
+_mock_backend = backend_from_env()
+
+# Identical requests in flight at the same time (e.g. several sessions
+# narrating a shared template) share one upstream call.
+IN_FLIGHT = SingleFlight()
+
+# Clients that failed with a connection error; `validate` drops them from the
+# resource cache on next access so the following request reconnects.
+_unhealthy_clients = set()
+
+
+# --- Client Registry ---
+def _is_healthy(client):
+    if id(client) in _unhealthy_clients:
+        _unhealthy_clients.discard(id(client))
+        return False
+    return True
+
+
+def _is_connection_error(e):
+    from google.api_core import exceptions as api_exceptions
+    return isinstance(e, (ConnectionError, api_exceptions.ServiceUnavailable, api_exceptions.DeadlineExceeded))
+
+
+@st.cache_resource(validate=_is_healthy)
+def get_gemini_model(model_name=GEMINI_MODEL):
+    """
+    Process-wide Gemini model; the underlying client and channel are reused.
+    """
+    # The Gemini SDK takes most of a second to import; only pay for it when used.
+    import google.generativeai as genai
+    return genai.GenerativeModel(model_name)
+
+
+@st.cache_resource(validate=_is_healthy)
+def get_tts_client():
+    """
+    Process-wide Cloud TTS client, so the gRPC channel and auth are set up once.
+    """
+    from google.cloud import texttospeech
+    return texttospeech.TextToSpeechClient()
+
+
+def with_reconnect(get_client, call):
+    """
+    Run `call(client)`; on a connection error, mark the client unhealthy and
+    retry once with a freshly built one.
+    """
+    client = get_client()
+    try:
+        return call(client)
+    except Exception as e:
+        if not _is_connection_error(e):
+            raise
+        _unhealthy_clients.add(id(client))
+        return call(get_client())
+
+
+# --- Gemini TTS Function ---
+def synthesize_text_gemini(text, voice_style="default"):
+    """
+    Synthesize text using a modern Gemini model (Pro or Flash) by specifying
+    the audio mime type in the generation config. This is the correct method.
+    """
+    try:
+        import google.ai.generativelanguage as glm # Import the low-level types
+
+        # The key is to provide the text directly as the content and use
+        # generation_config to specify the desired output format (MIME type).
+        response = with_reconnect(
+            get_gemini_model,
+            lambda model: model.generate_content(
+                text, # The text to be synthesized is the main content
+                generation_config=glm.GenerationConfig(
+                    response_mime_type="audio/mpeg" # Request MP3 audio output
+                )
+            )
+        )
+
+        # When the request is correct, the response will contain a Part with a blob.
+        if response.parts and response.parts[0].blob:
+            # The audio data is in the 'data' attribute of the 'blob'
+            return response.parts[0].blob.data, None
+        else:
+            # This handles cases where the model might refuse the request
+            error_info = "The model did not return audio. Check the prompt feedback."
+            try:
+                error_info += f" Safety Ratings: {response.prompt_feedback}"
+            except Exception:
+                pass
+            return None, NoAudioError(f"Gemini TTS Error: {error_info}", "Gemini TTS")
+
+    except Exception as e:
+        error_message = f"Gemini TTS Error: {str(e)}"
+        if "API_KEY_INVALID" in str(e):
+            error_message += " Please check if your GOOGLE_API_KEY is configured correctly."
+        elif "PERMISSION_DENIED" in str(e) or "access" in str(e).lower():
+            error_message += " Your API key may not have permission for the selected model. Check your Google Cloud project."
+        # This is a new, important error to catch!
+        elif "response_mime_type" in str(e):
+             error_message += " The selected model may not support audio output. Try 'gemini-1.5-pro'."
+        return None, classify_error(e, error_message, "Gemini TTS")
+
+
+# --- Fallback Google TTS Function ---
+def synthesize_text_google(text, voice, speed, pitch, audio_format="MP3"):
+    """
+    Fallback Google TTS implementation
+    """
+    try:
+        from google.cloud import texttospeech
+
+        input_text = texttospeech.SynthesisInput(text=text)
+        voice_params = texttospeech.VoiceSelectionParams(
+            language_code="-".join(voice.split("-")[:2]),
+            name=voice
+        )
+        audio_config = texttospeech.AudioConfig(
+            audio_encoding=texttospeech.AudioEncoding[OUTPUT_FORMATS[audio_format]["cloud_encoding"]],
+            speaking_rate=speed,
+            pitch=pitch
+        )
+
+        response = with_reconnect(
+            get_tts_client,
+            lambda client: client.synthesize_speech(
+                request={"input": input_text, "voice": voice_params, "audio_config": audio_config}
+            )
+        )
+
+        return response.audio_content, None
+    except Exception as e:
+        return None, classify_error(e, engine="Google Cloud TTS")
+
+
+# --- Engine Dispatch ---
+def use_mock_backend(backend):
+    """
+    Route every engine call to `backend` (a MockTTSBackend), or back to the
+    real APIs when `backend` is None.
+    """
+    global _mock_backend
+    _mock_backend = backend
+
+
+def mock_backend_enabled():
+    return _mock_backend is not None
+
+
+def native_format(engine, audio_format):
+    """
+    The format to request from `engine` when `audio_format` is wanted: the
+    format itself if the engine can produce it, otherwise MP3.
+    """
+    if _mock_backend is not None or engine not in OUTPUT_FORMATS[audio_format]["native"]:
+        return "MP3"
+    return audio_format
+
+
+def raw_synthesize(engine, text, voice, speed=1.0, pitch=0.0, audio_format="MP3"):
+    """
+    A single unguarded request to `engine`. Returns `(audio, error)`.
+    """
+    if _mock_backend is not None:
+        return _mock_backend.synthesize(engine, text, voice, speed, pitch)
+    if engine == "Gemini TTS":
+        return synthesize_text_gemini(text, voice)
+    if engine == "Google Cloud TTS":
+        return synthesize_text_google(text, voice, speed, pitch, audio_format)
+    return None, InvalidRequestError(f"Unknown TTS engine: {engine}")
+
+
+def model_for(engine):
+    return GEMINI_MODEL if engine == "Gemini TTS" else "cloud-tts"
+
+
+def default_voice(engine, language):
+    if engine == "Gemini TTS":
+        return "default"
+    return CLOUD_VOICES.get(language, [f"{language}-Standard-A"])[0]
+
+
+def call_engine(engine, text, voice, speed=1.0, pitch=0.0, stats=None, audio_format="MP3",
+                flow=None, priority=BATCH, weight=1.0):
+    """
+    One guarded upstream call: circuit breaker, fair scheduling, rate limit
+    and jittered retries for transient errors. `flow`, `priority` and
+    `weight` place each attempt in the engine's slot queue (see
+    `scheduler`). Returns `(audio, error)`. If `stats` is a dict, its
+    "attempts" entry counts the upstream attempts made and "latency" holds
+    the duration of the last one, excluding slot, rate limit and backoff waits.
+    """
+    if engine not in ENGINES:
+        return None, InvalidRequestError(f"Unknown TTS engine: {engine}")
+
+    breaker = get_circuit_breaker(engine)
+    if not breaker.allow():
+        return None, CircuitOpenError(f"{engine} is temporarily unavailable.", engine)
+
+    def attempt():
+        if stats is not None:
+            stats["attempts"] = stats.get("attempts", 0) + 1
+        with get_scheduler(engine).slot(flow, len(text), priority, weight):
+            get_rate_limiter(engine).acquire(len(text))
+            started = time.perf_counter()
+            try:
+                return raw_synthesize(engine, text, voice, speed, pitch, audio_format)
+            finally:
+                if stats is not None:
+                    stats["latency"] = time.perf_counter() - started
+
+    audio, error = call_with_retries(attempt)
+    breaker.record(error)
+    return audio, error
+
+
+def synthesize(engine, language, text, voice, speed=1.0, pitch=0.0, cache=None, failover=True, audio_format="MP3",
+               flow=None, priority=BATCH, weight=1.0):
+    """
+    Call the engine named `engine` (one of ENGINES), serving repeat requests
+    from `cache` when one is given and failing over to the engine's fallback
+    while it is down. `audio_format` must be one the engine produces natively
+    (see `native_format`); `flow`, `priority` and `weight` are passed on to
+    `call_engine`. Returns `(audio, error)`.
+    """
+    model = model_for(engine)
+    stats = {}
+
+    def call():
+        stats["called"] = True
+        return call_engine(engine, text, voice, speed, pitch, stats, audio_format, flow, priority, weight)
+
+    def lookup():
+        return call() if cache is None else cached_synthesis(cache, key, call)
+
+    started = time.perf_counter()
+    key = make_cache_key(engine, model, language, voice, speed, pitch, text, audio_format)
+    (audio, error), shared = IN_FLIGHT.do(key, lookup)
+    if shared:
+        outcome = "shared"
+    elif cache is None:
+        outcome = "none"
+    else:
+        outcome = "miss" if stats.get("called") else "hit"
+    # Upstream calls report the engine's own time; queue waits are recorded
+    # separately by the scheduler. Hits and shared results report the lookup.
+    record_synthesis(
+        engine, model, len(text), stats.get("latency", time.perf_counter() - started),
+        audio_bytes=len(audio) if audio else 0,
+        cache=outcome,
+        retries=max(0, stats.get("attempts", 0) - 1),
+        error=error,
+    )
+    record_phrase(engine, language, voice, speed, pitch, audio_format, text)
+
+    fallback = FAILOVER.get(engine)
+    if error and failover and fallback and (isinstance(error, CircuitOpenError) or is_retryable(error)):
+        return synthesize(fallback, language, text, default_voice(fallback, language), speed, pitch,
+                          cache=cache, failover=False, audio_format=audio_format,
+                          flow=flow, priority=priority, weight=weight)
+    return audio, error
@@ -0,0 +1,198 @@
+import asyncio
+import re
+import zlib
+from concurrent.futures import ThreadPoolExecutor
+
+# Sentence boundaries: terminal punctuation followed by whitespace.
+_SENTENCE_END = re.compile(r"(?<=[.!?])\s+")
+_PARAGRAPH_BREAK = re.compile(r"\n\s*\n")
+
+
+# --- Text Chunking ---
+def _size_check(max_chars, max_bytes):
+    if max_bytes is None:
+        return lambda text: len(text) <= max_chars
+    return lambda text: len(text) <= max_chars and len(text.encode("utf-8")) <= max_bytes
+
+
+def _split_long(sentence, fits):
+    # Fall back to word boundaries for sentences longer than a chunk.
+    words = sentence.split()
+    parts, current = [], ""
+    for word in words:
+        candidate = f"{current} {word}" if current else word
+        if fits(candidate):
+            current = candidate
+            continue
+        if current:
+            parts.append(current)
+        while not fits(word):
+            # Longest prefix that fits; slicing str never splits a multi-byte character.
+            low, high = 1, len(word) - 1
+            while low < high:
+                mid = (low + high + 1) // 2
+                if fits(word[:mid]):
+                    low = mid
+                else:
+                    high = mid - 1
+            cut = low
+            parts.append(word[:cut])
+            word = word[cut:]
+        current = word
+    if current:
+        parts.append(current)
+    return parts
+
+
+def _is_anchor(sentence, avg_sentences):
+    # crc32 rather than hash(): boundaries must be the same in every process.
+    return zlib.crc32(sentence.encode("utf-8")) % avg_sentences == 0
+
+
+def split_text(text, max_chars=1000, avg_sentences=4, max_bytes=None, sentence_end=_SENTENCE_END, min_chars=None):
+    """
+    Split text into chunks of at most `max_chars` (and, if given, at most
+    `max_bytes` of UTF-8), packing whole sentences split on `sentence_end`
+    and never joining across paragraph breaks.
+
+    Boundaries are content-defined: once a chunk holds `min_chars` (a quarter
+    of `max_chars` by default), it also ends after any sentence whose checksum
+    marks it as an anchor (about one in `avg_sentences`). Editing one
+    sentence therefore changes only the chunk containing it (or that chunk and
+    the next), and every other chunk keeps its exact text and cached audio.
+    A paragraph's short last chunk is evened out with the one before it.
+    """
+    fits = _size_check(max_chars, max_bytes)
+    min_chars = max_chars // 4 if min_chars is None else min_chars
+    chunks = []
+    for paragraph in _PARAGRAPH_BREAK.split(text.strip()):
+        paragraph = " ".join(paragraph.split())
+        if not paragraph:
+            continue
+        first = len(chunks)
+        current = ""
+        for sentence in sentence_end.split(paragraph):
+            if not sentence:
+                continue
+            pieces = [sentence] if fits(sentence) else _split_long(sentence, fits)
+            for piece in pieces:
+                candidate = f"{current} {piece}" if current else piece
+                if fits(candidate):
+                    current = candidate
+                else:
+                    chunks.append(current)
+                    current = piece
+            if len(current) >= min_chars and _is_anchor(sentence, avg_sentences):
+                chunks.append(current)
+                current = ""
+        if current and len(chunks) > first and len(current) < min_chars:
+            current = _balance_tail(chunks, current, fits, min_chars, sentence_end)
+        if current:
+            chunks.append(current)
+    return chunks
+
+
+def _balance_tail(chunks, tail, fits, min_chars, sentence_end):
+    # A paragraph's short last chunk joins the one before it, or else takes
+    # sentences from its end. Returns what is left to append.
+    joined = f"{chunks[-1]} {tail}"
+    if fits(joined):
+        chunks[-1] = joined
+        return ""
+    previous = [s for s in sentence_end.split(chunks[-1]) if s]
+    while len(tail) < min_chars and len(previous) > 1:
+        candidate = f"{previous[-1]} {tail}"
+        if not fits(candidate) or len(" ".join(previous[:-1])) < min_chars:
+            break
+        tail = candidate
+        previous.pop()
+    chunks[-1] = " ".join(previous)
+    return tail
+
+
+# --- Parallel Synthesis ---
+# Transient errors are already retried with backoff around each engine call
+# (`resilience.call_with_retries`), so chunks are not retried again here.
+def _synthesize_one(synthesize_chunk, chunk):
+    try:
+        audio, error = synthesize_chunk(chunk)
+    except Exception as e:
+        audio, error = None, str(e)
+    if audio and not error:
+        return audio, None
+    return None, error or "No audio returned."
+
+
+async def _synthesize_one_async(synthesize_chunk, chunk):
+    try:
+        audio, error = await synthesize_chunk(chunk)
+    except Exception as e:
+        audio, error = None, str(e)
+    if audio and not error:
+        return audio, None
+    return None, error or "No audio returned."
+
+
+def iter_synthesized_chunks(chunks, synthesize_chunk, max_workers=4):
+    """
+    Synthesize `chunks` concurrently and yield `(audio, error)` per chunk in
+    order, as soon as each one (and everything before it) is ready.
+
+    `synthesize_chunk(text)` must return `(audio, error)`. If a chunk fails,
+    its error is yielded and iteration stops. Repeated chunks are synthesized
+    once.
+    """
+    if not chunks:
+        return
+    unique = list(dict.fromkeys(chunks))
+    pool = ThreadPoolExecutor(max_workers=max(1, min(max_workers, len(unique))))
+    try:
+        futures = {chunk: pool.submit(_synthesize_one, synthesize_chunk, chunk) for chunk in unique}
+        for i, chunk in enumerate(chunks):
+            audio, error = futures[chunk].result()
+            if error:
+                if len(chunks) > 1:
+                    error = f"Chunk {i + 1} of {len(chunks)} failed: {error}"
+                yield None, error
+                return
+            yield audio, None
+    finally:
+        # Don't keep spending quota on chunks nobody will play.
+        pool.shutdown(wait=False, cancel_futures=True)
+
+
+def synthesize_chunked(chunks, synthesize_chunk, max_workers=4):
+    """
+    Synthesize `chunks` concurrently and join the audio in order.
+    Returns `(audio, error)`.
+    """
+    if not chunks:
+        return None, "No text to synthesize."
+    segments = []
+    for audio, error in iter_synthesized_chunks(chunks, synthesize_chunk, max_workers):
+        if error:
+            return None, error
+        segments.append(audio)
+    # MP3 frames are self-delimiting, so segments can be concatenated directly.
+    return b"".join(segments), None
+
+
+async def synthesize_chunked_async(chunks, synthesize_chunk):
+    """
+    Async counterpart of `synthesize_chunked`; `synthesize_chunk(text)` is a
+    coroutine returning `(audio, error)`. All chunks are awaited concurrently;
+    repeated chunks are synthesized once.
+    """
+    if not chunks:
+        return None, "No text to synthesize."
+    unique = list(dict.fromkeys(chunks))
+    by_chunk = dict(zip(unique, await asyncio.gather(
+        *(_synthesize_one_async(synthesize_chunk, chunk) for chunk in unique)
+    )))
+    results = [by_chunk[chunk] for chunk in chunks]
+    for i, (audio, error) in enumerate(results):
+        if error:
+            if len(chunks) > 1:
+                error = f"Chunk {i + 1} of {len(chunks)} failed: {error}"
+            return None, error
+    return b"".join(audio for audio, _ in results), None
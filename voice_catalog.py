@@ -0,0 +1,170 @@
+"""
+Cloud TTS voice catalog.
+
+The voice list is loaded from a disk cache (or the bundled snapshot when
+there is none) so startup and reruns never wait on the network. A stale
+cache is refreshed from `list_voices` on a background thread; the index is
+swapped in when it arrives.
+"""
+import json
+import logging
+import os
+import threading
+import time
+from collections import defaultdict
+
+logger = logging.getLogger("tts.voices")
+
+SNAPSHOT_PATH = os.path.join(os.path.dirname(os.path.abspath(__file__)), "voices_snapshot.json")
+
+# Display names for the tier embedded in voice names (en-US-Wavenet-D).
+TIERS = {
+    "Standard": "Standard",
+    "Wavenet": "WaveNet",
+    "Neural2": "Neural2",
+    "Studio": "Studio",
+    "News": "News",
+    "Polyglot": "Polyglot",
+    "Casual": "Casual",
+    "Journey": "Journey",
+    "Chirp-HD": "Chirp HD",
+    "Chirp3-HD": "Chirp 3 HD",
+}
+
+
+def voice_tier(name):
+    # "<lang>-<REGION>-<tier>-<variant>"; the tier itself may contain a dash.
+    parts = name.split("-")
+    middle = "-".join(parts[2:-1])
+    return TIERS.get(middle, middle or "Standard")
+
+
+# --- Catalog ---
+class VoiceCatalog:
+    """
+    Voices indexed by language code, with gender and tier filters.
+    """
+
+    def __init__(self, voices, fetched_at=None, source="snapshot"):
+        self.fetched_at = fetched_at
+        self.source = source
+        self._lock = threading.Lock()
+        self._index(voices)
+
+    def _index(self, voices):
+        by_language = defaultdict(list)
+        by_name = {}
+        for voice in sorted(voices, key=lambda v: v["name"]):
+            voice = dict(voice, tier=voice_tier(voice["name"]))
+            by_name[voice["name"]] = voice
+            for code in voice["language_codes"]:
+                by_language[code].append(voice)
+        with self._lock:
+            self.voices = list(by_name.values())
+            self._by_language = dict(by_language)
+            self._by_name = by_name
+
+    def replace(self, voices, fetched_at, source):
+        self._index(voices)
+        self.fetched_at = fetched_at
+        self.source = source
+
+    def languages(self):
+        with self._lock:
+            return sorted(self._by_language)
+
+    def voices_for(self, language, gender=None, tier=None):
+        with self._lock:
+            voices = self._by_language.get(language, [])
+        return [
+            v for v in voices
+            if (gender is None or v["gender"] == gender) and (tier is None or v["tier"] == tier)
+        ]
+
+    def genders(self, language):
+        return sorted({v["gender"] for v in self.voices_for(language)})
+
+    def tiers(self, language):
+        return sorted({v["tier"] for v in self.voices_for(language)})
+
+    def describe(self, name):
+        with self._lock:
+            voice = self._by_name.get(name)
+        if voice is None:
+            return name
+        return f"{name} · {voice['gender'].title()} · {voice['tier']}"
+
+
+# --- Loading ---
+def fetch_voices():
+    """
+    The live voice list from Cloud TTS, as plain dicts.
+    """
+    from google.cloud import texttospeech
+
+    from tts_engines import get_tts_client
+
+    response = get_tts_client().list_voices()
+    return [
+        {
+            "name": voice.name,
+            "language_codes": list(voice.language_codes),
+            "gender": texttospeech.SsmlVoiceGender(voice.ssml_gender).name,
+            "sample_rate_hertz": voice.natural_sample_rate_hertz,
+        }
+        for voice in response.voices
+    ]
+
+
+def _read(path):
+    try:
+        with open(path, encoding="utf-8") as f:
+            return json.load(f)
+    except (FileNotFoundError, ValueError):
+        return None
+
+
+def _write(path, voices, fetched_at):
+    tmp_path = f"{path}.tmp"
+    with open(tmp_path, "w", encoding="utf-8") as f:
+        json.dump({"fetched_at": fetched_at, "voices": voices}, f, ensure_ascii=False)
+    os.replace(tmp_path, path)
+
+
+def refresh_catalog(catalog, cache_path, fetch=fetch_voices):
+    """
+    Fetch the live voice list into `catalog` and the disk cache. Failures are
+    logged and leave the catalog as it was.
+    """
+    try:
+        voices = fetch()
+    except Exception as e:
+        logger.warning("Could not refresh the voice catalog: %s", e)
+        return False
+    fetched_at = time.time()
+    catalog.replace(voices, fetched_at, "live")
+    try:
+        _write(cache_path, voices, fetched_at)
+    except OSError as e:
+        logger.warning("Could not write the voice cache: %s", e)
+    return True
+
+
+def load_catalog(cache_path=".voice_catalog.json", ttl_seconds=24 * 3600, fetch=fetch_voices, refresh=True):
+    """
+    Load the catalog from the disk cache, falling back to the bundled
+    snapshot. Never blocks on the network: when the cache is missing or
+    older than `ttl_seconds` and `refresh` is set, a background thread
+    fetches the live list.
+    """
+    cached = _read(cache_path)
+    if cached is not None:
+        catalog = VoiceCatalog(cached["voices"], cached.get("fetched_at"), "cache")
+    else:
+        catalog = VoiceCatalog(_read(SNAPSHOT_PATH)["voices"])
+    stale = catalog.fetched_at is None or time.time() - catalog.fetched_at > ttl_seconds
+    if refresh and stale:
+        threading.Thread(
+            target=refresh_catalog, args=(catalog, cache_path, fetch), name="tts-voice-catalog", daemon=True
+        ).start()
+    return catalog
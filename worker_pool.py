@@ -0,0 +1,222 @@
+"""
+Optional multi-process worker tier for generation.
+
+The Streamlit process hosts a small broker (a multiprocessing manager
+serving a task queue and an update queue) and only dispatches and renders.
+Worker processes, local or on other nodes, pull generation specs from the
+broker, synthesize them against the shared on-disk audio cache and media
+store, and stream progress back.
+
+Extra workers on another node:
+
+    python worker_pool.py --connect app-host:50000 --authkey SECRET --processes 8
+
+AUDIO_CACHE_DIR and MEDIA_STORE_DIR must point at storage shared with the
+app (e.g. an NFS mount) for remote workers. Each worker process keeps its
+own rate limiters and engine slots, so they are sized to an equal share of
+the engine quotas: TTS_WORKER_TOTAL is the number of worker processes on all
+nodes together.
+"""
+import argparse
+import logging
+import multiprocessing
+import os
+import queue
+import secrets
+import sys
+import threading
+import uuid
+from multiprocessing.managers import BaseManager
+
+from audio_cache import AudioCache
+from generation import run_generation
+from media_store import MediaStore
+
+logger = logging.getLogger("tts.workers")
+
+
+class _BrokerManager(BaseManager):
+    pass
+
+
+def parse_address(value):
+    host, _, port = value.rpartition(":")
+    return host or "127.0.0.1", int(port)
+
+
+# --- Worker ---
+def stores_from_env():
+    """
+    The audio cache and media store a worker shares with the app, configured
+    by the same environment variables.
+    """
+    ttl = os.environ.get("AUDIO_CACHE_TTL_SECONDS")
+    cache = AudioCache(
+        cache_dir=os.environ.get("AUDIO_CACHE_DIR", ".audio_cache"),
+        max_memory_bytes=int(os.environ.get("AUDIO_CACHE_MEMORY_MB", "64")) * 1024 * 1024,
+        max_disk_bytes=int(os.environ.get("AUDIO_CACHE_DISK_MB", "1024")) * 1024 * 1024,
+        ttl_seconds=float(ttl) if ttl else None,
+    )
+    store = MediaStore(
+        root=os.environ.get("MEDIA_STORE_DIR", ".media"),
+        max_bytes=int(os.environ.get("MEDIA_STORE_MB", "2048")) * 1024 * 1024,
+    )
+    return cache, store
+
+
+def run_worker(address, authkey, total=1):
+    """
+    Pull tasks from the broker at `address` until it goes away, using
+    1/`total` of each engine quota.
+    """
+    # Before the first engine call builds the limiters and slot schedulers.
+    os.environ["TTS_WORKER_TOTAL"] = str(total)
+    _BrokerManager.register("tasks")
+    _BrokerManager.register("updates")
+    manager = _BrokerManager(address=address, authkey=authkey)
+    manager.connect()
+    tasks, updates = manager.tasks(), manager.updates()
+    cache, store = stores_from_env()
+    while True:
+        try:
+            task_id, spec, started = tasks.get()
+        except (EOFError, ConnectionError):
+            return
+
+        def report(done, total, part=None):
+            updates.put((task_id, "progress", (done, total, part)))
+
+        try:
+            result, error = run_generation(spec, store, cache, report, started)
+        except Exception as e:
+            logger.exception("Task %s crashed", task_id)
+            result, error = None, f"Unexpected error: {e}"
+        # Errors cross the process boundary as text.
+        updates.put((task_id, "finished", (result, str(error) if error else None)))
+
+
+# --- Dispatcher ---
+class WorkerPool:
+    """
+    Broker plus `processes` local worker processes. Remote workers connect
+    to `address` with `authkey`; `total` counts them in (it defaults to
+    `processes`) and sets each worker's share of the quotas. `run()` blocks
+    the calling job thread until a worker finishes the spec, so the job queue
+    should have at least `total` threads.
+    """
+
+    def __init__(self, processes=0, address=("127.0.0.1", 0), authkey=None, timeout=600, total=None):
+        self.total = max(total or processes, 1)
+        self.authkey = authkey or secrets.token_bytes(16)
+        self.timeout = timeout
+        self._tasks = queue.Queue()
+        self._updates = queue.Queue()
+        self._pending = {}  # task_id -> (report, event, outcome)
+        self._lock = threading.Lock()
+
+        _BrokerManager.register("tasks", callable=lambda: self._tasks)
+        _BrokerManager.register("updates", callable=lambda: self._updates)
+        server = _BrokerManager(address=address, authkey=self.authkey).get_server()
+        self.address = server.address
+        threading.Thread(target=server.serve_forever, name="tts-broker", daemon=True).start()
+        threading.Thread(target=self._route_updates, name="tts-broker-updates", daemon=True).start()
+
+        # Spawn rather than fork: the Streamlit process is full of threads.
+        context = multiprocessing.get_context("spawn")
+        self.processes = [
+            context.Process(
+                target=run_worker, args=(self.address, self.authkey, self.total), name=f"tts-worker-{i}", daemon=True,
+            )
+            for i in range(processes)
+        ]
+        for process in self.processes:
+            process.start()
+
+    def run(self, spec, report=None, started=None):
+        """
+        Hand `spec` to a worker and wait for it. Returns `(result, error)`.
+        """
+        task_id = uuid.uuid4().hex
+        event = threading.Event()
+        outcome = {}
+        with self._lock:
+            self._pending[task_id] = (report, event, outcome)
+        self._tasks.put((task_id, spec, started))
+        finished = event.wait(self.timeout)
+        with self._lock:
+            self._pending.pop(task_id, None)
+        if not finished:
+            return None, f"No worker finished the request within {self.timeout:.0f}s."
+        return outcome["result"], outcome["error"]
+
+    def depth(self):
+        return self._tasks.qsize()
+
+    def _route_updates(self):
+        while True:
+            task_id, kind, payload = self._updates.get()
+            with self._lock:
+                pending = self._pending.get(task_id)
+            if pending is None:
+                # Timed out already.
+                continue
+            report, event, outcome = pending
+            if kind == "progress":
+                if report:
+                    report(*payload)
+            else:
+                outcome["result"], outcome["error"] = payload
+                event.set()
+
+
+def pool_from_env():
+    """
+    Build a WorkerPool when TTS_WORKER_PROCESSES or TTS_WORKER_ADDRESS is
+    set, else return None (generation runs on in-process threads).
+    TTS_WORKER_TOTAL counts remote workers in.
+    """
+    processes = int(os.environ.get("TTS_WORKER_PROCESSES", "0"))
+    bind = os.environ.get("TTS_WORKER_ADDRESS")
+    if processes <= 0 and not bind:
+        return None
+    authkey = os.environ.get("TTS_WORKER_AUTHKEY")
+    total = os.environ.get("TTS_WORKER_TOTAL")
+    return WorkerPool(
+        processes=processes,
+        address=parse_address(bind) if bind else ("127.0.0.1", 0),
+        authkey=authkey.encode() if authkey else None,
+        timeout=float(os.environ.get("TTS_WORKER_TIMEOUT", "600")),
+        total=int(total) if total else None,
+    )
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Run TTS generation workers against a remote app.")
+    parser.add_argument("--connect", required=True, help="broker address, host:port (TTS_WORKER_ADDRESS of the app)")
+    parser.add_argument("--authkey", default=os.environ.get("TTS_WORKER_AUTHKEY"), help="shared secret (TTS_WORKER_AUTHKEY)")
+    parser.add_argument("--processes", type=int, default=os.cpu_count() or 1)
+    parser.add_argument(
+        "--total", type=int, default=int(os.environ.get("TTS_WORKER_TOTAL", "0")) or None,
+        help="worker processes on all nodes, for quota shares (TTS_WORKER_TOTAL of the app)",
+    )
+    args = parser.parse_args(argv)
+    if not args.authkey:
+        parser.error("--authkey (or TTS_WORKER_AUTHKEY) is required")
+    logging.basicConfig(level=logging.INFO)
+
+    address = parse_address(args.connect)
+    total = args.total or args.processes
+    context = multiprocessing.get_context("spawn")
+    processes = [
+        context.Process(target=run_worker, args=(address, args.authkey.encode(), total), name=f"tts-worker-{i}")
+        for i in range(args.processes)
+    ]
+    for process in processes:
+        process.start()
+    for process in processes:
+        process.join()
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())